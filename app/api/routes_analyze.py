@@ -24,7 +24,9 @@ import tempfile
 import shutil
 import os
 import json
+import logging
 import cv2
+from functools import partial
 from sqlalchemy.orm import Session
 from app.core.database import get_db, Base, engine
 from fastapi import Depends
@@ -36,12 +38,32 @@ from app.models.user import User
 from app.models.db import SwingSession
 from typing import List, Optional
 from fastapi.responses import FileResponse, StreamingResponse
-from app.services.report_service import ReportService
+from starlette.background import BackgroundTask
+from pose.pose_archive import load_pose_dicts
+
+logger = logging.getLogger(__name__)
 
 # Create tables on startup (for dev simplicity)
 Base.metadata.create_all(bind=engine)
 
 
+def _load_session_poses(session_id: str) -> list:
+    """Stored pose frames for a session: the quantized `_poses.npz` archive,
+    or the `_poses.json` written by older versions. Empty list if neither exists."""
+    storage = get_storage()
+    try:
+        npz_path = storage.get_path(f"videos/{session_id}_poses.npz")
+        if os.path.exists(npz_path):
+            return load_pose_dicts(npz_path)
+        json_path = storage.get_path(f"videos/{session_id}_poses.json")
+        if os.path.exists(json_path):
+            with open(json_path, "r") as f:
+                return json.load(f)
+    except Exception as e:
+        logger.warning(f"Could not load poses for session {session_id}: {e}")
+    return []
+
+
 def _get_feedback_from_db(feedback_db) -> SwingFeedback:
     """Convert database feedback to SwingFeedback schema, handling None.
        Handles migration of legacy drill data (missing IDs/categories).
@@ -655,19 +677,7 @@ def get_session_poses(session_id: str, db: Session = Depends(get_db), current_us
         raise HTTPException(status_code=403, detail="Not authorized")
 
     # Load original poses via storage
-    key = f"videos/{session_id}_poses.json"
-    storage = get_storage()
-    try:
-        poses_path = storage.get_path(key)
-        if not os.path.exists(poses_path):
-            return []
-            
-        import json
-        with open(poses_path, "r") as f:
-            poses_data = json.load(f)
-        return poses_data
-    except:
-        return []
+    return _load_session_poses(session_id)
 
 @router.delete("/sessions/{session_id}")
 def delete_session(session_id: str, db: Session = Depends(get_db), current_user: User = Depends(get_current_active_user)):
@@ -679,7 +689,8 @@ def delete_session(session_id: str, db: Session = Depends(get_db), current_user:
     if s.user_id != current_user.id:
         raise HTTPException(status_code=403, detail="Not authorized")
         
-    # Delete from DB
+    # Delete from DB (read video_url first; the ORM object is stale afterwards)
+    video_url = s.video_url
     repo.delete_session(session_id)
     
     # Delete files via storage
@@ -687,10 +698,11 @@ def delete_session(session_id: str, db: Session = Depends(get_db), current_user:
     
     # 1. Video
     # Try video_url field if it exists and looks like a key, else fallback
-    if s.video_url:
-        storage.delete(s.video_url)
+    if video_url:
+        storage.delete(video_url)
     
     # 2. Poses
+    storage.delete(f"videos/{session_id}_poses.npz")
     storage.delete(f"videos/{session_id}_poses.json")
     
     # 3. Keyframes
@@ -710,19 +722,9 @@ def get_session_key_frames(session_id: str, db: Session = Depends(get_db), curre
     if s.user_id != current_user.id:
         raise HTTPException(status_code=403, detail="Not authorized")
     
-    # Load poses from JSON file via storage
-    key = f"videos/{session_id}_poses.json"
-    storage = get_storage()
-    
-    import json
-    
-    try:
-        poses_path = storage.get_path(key)
-        if not os.path.exists(poses_path):
-            return []
-        with open(poses_path, "r") as f:
-            poses_data = json.load(f)
-    except:
+    # Load stored poses via storage
+    poses_data = _load_session_poses(session_id)
+    if not poses_data:
         return []
     
     # NOTE: Blending is now applied during analysis.
@@ -864,7 +866,7 @@ async def regenerate_feedback_endpoint(
     if not session.metrics:
          raise HTTPException(status_code=400, detail="Metrics not found for session")
 
-    metrics_data = {k: v for k, v in session.metrics.__dict__.items() if not k.startswith('_')}
+    metrics_data = {k: getattr(session.metrics, k) for k in SwingMetrics.model_fields if hasattr(session.metrics, k)}
     # Ensure all required fields for SwingMetrics are present (basic validation)
     # Pydantic will validate, but we might need to be careful with optional fields
     # Here we assume DB metrics row matches Pydantic schema sufficiently
@@ -905,18 +907,22 @@ async def regenerate_feedback_endpoint(
 
 
 @router.get("/sessions/{session_id}/report")
-async def generate_report_endpoint(
+def generate_report_endpoint(
     session_id: str,
     db: Session = Depends(get_db)
 ):
     """
     Generate a PDF report for the swing session.
+    Sync on purpose: FastAPI runs it in the threadpool, so the DB load and the
+    CPU-bound doc.build don't stall the event loop for other requests.
     """
     analysis_repo = AnalysisRepository(db)
     session = analysis_repo.get_session(session_id)
     if not session:
         raise HTTPException(status_code=404, detail="Session not found")
 
+    # Imported on first use: ReportLab is heavy and only this route needs it
+    from app.services.report_service import ReportService
     report_service = ReportService()
     try:
         pdf_buffer = report_service.generate_report(session)
@@ -925,7 +931,12 @@ async def generate_report_endpoint(
             'Content-Disposition': f'attachment; filename="SwingReport_{session_id[:8]}.pdf"'
         }
         
-        return StreamingResponse(pdf_buffer, headers=headers, media_type='application/pdf')
+        return StreamingResponse(
+            iter(partial(pdf_buffer.read, 64 * 1024), b""),
+            headers=headers,
+            media_type='application/pdf',
+            background=BackgroundTask(pdf_buffer.close),
+        )
     except Exception as e:
         import traceback
         traceback.print_exc()
@@ -23,6 +23,16 @@ from app.services.job_queue import get_queue, QueueMessage
 router = APIRouter()
 
 
+def _job_status_response(job: AnalysisJob) -> JobStatusResponse:
+    """Job row plus the worker's in-memory progress while it is processing."""
+    response = JobStatusResponse.from_orm(job)
+    if job.status == JobStatus.PROCESSING:
+        live = get_queue().get_progress(job.id)
+        if live is not None:
+            response = response.model_copy(update={"progress": live[0], "current_step": live[1]})
+    return response
+
+
 @router.post("/analyze", response_model=JobQueueResponse)
 async def queue_analysis(
     video: UploadFile = File(...),
@@ -115,7 +125,7 @@ async def get_job_status(
     if not job:
         raise HTTPException(status_code=404, detail="Job not found")
     
-    return JobStatusResponse.from_orm(job)
+    return _job_status_response(job)
 
 
 @router.get("", response_model=List[JobStatusResponse])
@@ -143,7 +153,7 @@ async def list_jobs(
     
     jobs = query.order_by(AnalysisJob.created_at.desc()).limit(limit).all()
     
-    return [JobStatusResponse.from_orm(job) for job in jobs]
+    return [_job_status_response(job) for job in jobs]
 
 
 @router.delete("/{job_id}")
@@ -1,8 +1,11 @@
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event, inspect, text
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
+import logging
 import os
 
+logger = logging.getLogger(__name__)
+
 # Use SQLite for local development (no separate database server needed)
 # Database file will be created in the project root
 SQLALCHEMY_DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./golf_analyzer.db")
@@ -12,10 +15,57 @@ engine = create_engine(
     SQLALCHEMY_DATABASE_URL, 
     connect_args={"check_same_thread": False} if SQLALCHEMY_DATABASE_URL.startswith("sqlite") else {}
 )
+if SQLALCHEMY_DATABASE_URL.startswith("sqlite"):
+    @event.listens_for(engine, "connect")
+    def _set_sqlite_pragmas(dbapi_connection, connection_record):
+        # WAL: readers don't block the worker's writes (and vice versa), and with
+        # synchronous=NORMAL a commit no longer fsyncs; only checkpoints do.
+        cursor = dbapi_connection.cursor()
+        cursor.execute("PRAGMA journal_mode=WAL")
+        cursor.execute("PRAGMA synchronous=NORMAL")
+        cursor.close()
+
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
 Base = declarative_base()
 
+def ensure_indexes(bind=engine):
+    """Add model indexes missing from tables created before they were declared.
+
+    create_all only builds indexes along with a new table, so existing databases
+    would lack e.g. the unique swing_feedback.session_id index that the feedback
+    upsert relies on. Before a unique index is created (or a plain index of the
+    same name is rebuilt as unique) duplicate rows are dropped, keeping the
+    newest row per key. Idempotent; run at startup.
+    """
+    with bind.begin() as conn:
+        insp = inspect(conn)
+        for table in Base.metadata.sorted_tables:
+            if not insp.has_table(table.name):
+                continue
+            existing = {ix["name"]: ix for ix in insp.get_indexes(table.name)}
+            columns = {c["name"] for c in insp.get_columns(table.name)}
+            for index in table.indexes:
+                current = existing.get(index.name)
+                if current is not None and (current["unique"] or not index.unique):
+                    continue
+                if not {c.name for c in index.columns} <= columns:
+                    logger.warning(f"Skipping index {index.name}: {table.name} needs migrating (scripts/migrate_db.py)")
+                    continue
+                if index.unique:
+                    # Older tables had no unique index (or a plain one), so
+                    # they may hold duplicate keys the new index would reject
+                    cols = ", ".join(c.name for c in index.columns)
+                    not_null = " AND ".join(f"{c.name} IS NOT NULL" for c in index.columns)
+                    conn.execute(text(
+                        f"DELETE FROM {table.name} WHERE {not_null} AND id NOT IN "
+                        f"(SELECT MAX(id) FROM {table.name} GROUP BY {cols})"
+                    ))
+                if current is not None:
+                    index.drop(conn)
+                index.create(conn)
+
+
 def get_db():
     db = SessionLocal()
     try:
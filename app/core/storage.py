@@ -1,8 +1,9 @@
 from abc import ABC, abstractmethod
 import os
 import shutil
+import threading
 from pathlib import Path
-from typing import Union, BinaryIO
+from typing import Iterable, Union, BinaryIO
 
 class BaseStorage(ABC):
     """Abstract base class for file storage"""
@@ -34,6 +35,10 @@ class BaseStorage(ABC):
         """Get local filesystem path (if applicable, for processing tools)"""
         pass
 
+    def delete_many(self, keys: Iterable[str]) -> int:
+        """Delete several keys; returns how many existed. Backends may batch this."""
+        return sum(1 for key in keys if self.delete(key))
+
 class LocalStorage(BaseStorage):
     def __init__(self, base_dir: str = "storage"):
         self.base_dir = Path(base_dir)
@@ -46,8 +51,7 @@ class LocalStorage(BaseStorage):
         target_path.parent.mkdir(parents=True, exist_ok=True)
         
         if isinstance(file_obj, (str, Path)):
-            # Copy from path
-            shutil.copy2(file_obj, target_path)
+            self._link_or_copy(file_obj, target_path)
         else:
             # Write from file-like object
             with open(target_path, "wb") as f:
@@ -57,6 +61,23 @@ class LocalStorage(BaseStorage):
                     f.write(file_obj)
                     
         return self.get_url(key)
+
+    @staticmethod
+    def _link_or_copy(src: Union[str, Path], target_path: Path):
+        """
+        Hardlink src into storage (zero-copy, same filesystem) and fall back to a
+        plain content copy. The source stays in place either way, since callers
+        still read or clean up their temp files after saving.
+        """
+        try:
+            target_path.unlink(missing_ok=True)
+            os.link(src, target_path)
+            return
+        except OSError:
+            pass  # EXDEV (other filesystem) or links unsupported
+        # copyfile uses sendfile()/fcopyfile() in-kernel where available; the
+        # fresh temp file's metadata isn't worth copy2's extra stat/utime calls.
+        shutil.copyfile(src, target_path)
         
     def get_url(self, key: str) -> str:
         # In a real app, this would point to a static file server or generic endpoint
@@ -70,16 +91,33 @@ class LocalStorage(BaseStorage):
             return True
         return False
 
+    def delete_many(self, keys: Iterable[str]) -> int:
+        # One unlink per key: no exists() stat and no Path objects
+        base = os.fspath(self.base_dir)
+        deleted = 0
+        for key in keys:
+            try:
+                os.unlink(os.path.join(base, key))
+                deleted += 1
+            except FileNotFoundError:
+                pass
+        return deleted
+
     def get_path(self, key: str) -> str:
         """Helper for local processing tools (FFmpeg, OpenCV) that need a real path"""
         return str((self.base_dir / key).absolute())
 
 # Singleton / Factory
 _storage_instance = None
+_storage_lock = threading.Lock()
 
 def get_storage() -> BaseStorage:
     global _storage_instance
-    if _storage_instance is None:
-        # In future: Check env var STORAGE_PROVIDER=s3
-        _storage_instance = LocalStorage()
-    return _storage_instance
+    storage = _storage_instance  # fast path: single global read, no lock
+    if storage is None:
+        with _storage_lock:
+            if _storage_instance is None:
+                # In future: Check env var STORAGE_PROVIDER=s3
+                _storage_instance = LocalStorage()
+            storage = _storage_instance
+    return storage
@@ -4,7 +4,7 @@ load_dotenv(override=True)
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from app.api import routes_analyze, routes_auth, routes_analytics, routes_drills, routes_admin, routes_jobs, routes_storage
-from app.core.database import Base, engine
+from app.core.database import Base, engine, ensure_indexes
 import logging
 
 logging.basicConfig(level=logging.INFO)
@@ -38,6 +38,7 @@ async def startup_event():
     # Create database tables (including new AnalysisJob table)
     from app.models.job import AnalysisJob  # Import to register model
     Base.metadata.create_all(bind=engine)
+    ensure_indexes(engine)
     logger.info("✅ Database tables created")
     
     # Initialize job queue
@@ -1,5 +1,6 @@
-from sqlalchemy import Column, Integer, String, Float, DateTime, ForeignKey, JSON, Boolean
+from sqlalchemy import Column, Integer, String, Float, DateTime, ForeignKey, JSON, Boolean, Index
 from sqlalchemy.orm import relationship
+from sqlalchemy.ext.hybrid import hybrid_property
 from sqlalchemy.sql import func
 from app.core.database import Base
 import uuid
@@ -7,6 +8,25 @@ import uuid
 def generate_uuid():
     return str(uuid.uuid4())
 
+# Legacy metric column name -> renamed metric it duplicates
+LEGACY_METRIC_ALIASES = {
+    "shoulder_turn_top_deg": "chest_turn_top_deg",
+    "hip_turn_top_deg": "pelvis_turn_top_deg",
+    "spine_tilt_address_deg": "spine_angle_address_deg",
+    "spine_tilt_impact_deg": "spine_angle_impact_deg",
+}
+
+def _legacy_alias(stored_attr: str, current_attr: str) -> hybrid_property:
+    """Stored legacy value if present, otherwise the renamed metric (Python and SQL)."""
+    def fget(self):
+        value = getattr(self, stored_attr)
+        return value if value is not None else getattr(self, current_attr)
+
+    def expr(cls):
+        return func.coalesce(getattr(cls, stored_attr), getattr(cls, current_attr))
+
+    return hybrid_property(fget, expr=expr)
+
 class SwingSession(Base):
     __tablename__ = "swing_sessions"
 
@@ -32,11 +52,27 @@ class SwingSession(Base):
     phases = relationship("SwingPhase", back_populates="session", uselist=False)
     feedback = relationship("SwingFeedbackDB", back_populates="session", uselist=False)
 
+# Composite indexes for the hot session lookups:
+# recent swings (user [+ club] ordered by created_at), the best-score check
+# (user, club, view by score) and the current personal best.
+Index("ix_swing_user_created", SwingSession.user_id, SwingSession.created_at.desc())
+Index("ix_swing_user_club_created", SwingSession.user_id, SwingSession.club_type, SwingSession.created_at.desc())
+Index(
+    "ix_swing_user_club_view_score",
+    SwingSession.user_id, SwingSession.club_type, SwingSession.view, SwingSession.overall_score.desc(),
+)
+Index(
+    "ix_swing_personal_best",
+    SwingSession.club_type, SwingSession.view, SwingSession.user_id,
+    postgresql_where=SwingSession.is_personal_best == True,
+    sqlite_where=SwingSession.is_personal_best == True,
+)
+
 class SwingMetric(Base):
     __tablename__ = "swing_metrics"
 
     id = Column(Integer, primary_key=True, index=True)
-    session_id = Column(String, ForeignKey("swing_sessions.id"))
+    session_id = Column(String, ForeignKey("swing_sessions.id", ondelete="CASCADE"))
     
     tempo_ratio = Column(Float)
     backswing_duration_ms = Column(Float)
@@ -107,10 +143,17 @@ class SwingMetric(Base):
     
     # Backward compatibility fields
     # Legacy Metrics (kept for backward compatibility)
-    shoulder_turn_top_deg = Column(Float, nullable=True)
-    hip_turn_top_deg = Column(Float, nullable=True)
-    spine_tilt_address_deg = Column(Float, nullable=True)
-    spine_tilt_impact_deg = Column(Float, nullable=True)
+    # The turn/tilt names usually duplicate the renamed metrics; new rows store
+    # NULL then and only keep a value that differs (the MHR pipeline replaces
+    # the renamed metrics with 3D values). Read through the hybrids below.
+    _shoulder_turn_top_deg = Column("shoulder_turn_top_deg", Float, nullable=True)
+    _hip_turn_top_deg = Column("hip_turn_top_deg", Float, nullable=True)
+    _spine_tilt_address_deg = Column("spine_tilt_address_deg", Float, nullable=True)
+    _spine_tilt_impact_deg = Column("spine_tilt_impact_deg", Float, nullable=True)
+    shoulder_turn_top_deg = _legacy_alias("_shoulder_turn_top_deg", "chest_turn_top_deg")
+    hip_turn_top_deg = _legacy_alias("_hip_turn_top_deg", "pelvis_turn_top_deg")
+    spine_tilt_address_deg = _legacy_alias("_spine_tilt_address_deg", "spine_angle_address_deg")
+    spine_tilt_impact_deg = _legacy_alias("_spine_tilt_impact_deg", "spine_angle_impact_deg")
     head_movement_forward_cm = Column(Float, nullable=True)
     head_movement_vertical_cm = Column(Float, nullable=True)
     shaft_lean_impact_deg = Column(Float, nullable=True)
@@ -127,7 +170,7 @@ class SwingPhase(Base):
     __tablename__ = "swing_phases"
 
     id = Column(Integer, primary_key=True, index=True)
-    session_id = Column(String, ForeignKey("swing_sessions.id"))
+    session_id = Column(String, ForeignKey("swing_sessions.id", ondelete="CASCADE"))
     
     address_frame = Column(Integer)
     top_frame = Column(Integer)
@@ -140,7 +183,7 @@ class SwingFeedbackDB(Base):
     __tablename__ = "swing_feedback"
 
     id = Column(Integer, primary_key=True, index=True)
-    session_id = Column(String, ForeignKey("swing_sessions.id"))
+    session_id = Column(String, ForeignKey("swing_sessions.id", ondelete="CASCADE"), unique=True, index=True)  # One feedback row per session (upsert target)
     
     summary = Column(String)
     priority_issues = Column(JSON) # List of strings
@@ -7,7 +7,6 @@ from sqlalchemy.orm import Session
 from fastapi import HTTPException
 
 # Models & Services
-from app.models.db import SwingSession
 from app.services.video_storage import VideoStorage
 from app.services.feedback_service import FeedbackService
 from app.services.analysis_repository import AnalysisRepository
@@ -153,20 +152,6 @@ def run_analysis_pipeline(
     # 7. Persistence
     repo = AnalysisRepository(db)
     
-    # Check PB
-    max_score_session = db.query(SwingSession).filter(
-        SwingSession.user_id == user_id,
-        SwingSession.club_type == club_type,
-        SwingSession.view == view
-    ).order_by(SwingSession.overall_score.desc()).first()
-    
-    is_pb = False
-    if not max_score_session or scores.overall_score > max_score_session.overall_score:
-        is_pb = True
-        if max_score_session and max_score_session.is_personal_best:
-            max_score_session.is_personal_best = False
-            db.add(max_score_session)
-
     db_session = repo.save_analysis(
         metadata=SwingAnalysisRequest(handedness=handedness, view=view, club_type=club_type),
         metrics=metrics,
@@ -177,10 +162,8 @@ def run_analysis_pipeline(
         user_id=user_id
     )
 
-    if is_pb:
-        db_session.is_personal_best = True
-        db.add(db_session)
-        db.commit()
+    # Check PB (after saving, compared in SQL against the user's other sessions)
+    repo.claim_personal_best(db_session.id, club_type, view, user_id=user_id)
 
     # Save Video
     video_storage = VideoStorage()
@@ -1,8 +1,47 @@
-from sqlalchemy.orm import Session
-from app.models.db import SwingSession, SwingMetric, SwingPhase, SwingFeedbackDB, ReferenceProfileDB
+import logging
+import time
+from typing import List, Optional, Tuple
+
+import numpy as np
+from sqlalchemy import delete, select, update
+from sqlalchemy.orm import Session, aliased, selectinload
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from app.models.db import SwingSession, SwingMetric, SwingPhase, SwingFeedbackDB, ReferenceProfileDB, generate_uuid, LEGACY_METRIC_ALIASES
 from app.schemas import SwingMetrics, SwingPhases, SwingScores, SwingFeedback, SwingAnalysisRequest, ReferenceProfileCreate
 from reference.reference_profiles import MetricTarget
 
+logger = logging.getLogger(__name__)
+
+# Metric columns that map 1:1 onto SwingMetrics fields (table order kept for exports)
+_METRIC_EXPORT_COLS = tuple(
+    c.name for c in SwingMetric.__table__.columns if c.name not in ("id", "session_id")
+)
+# Written on insert as-is; legacy aliases are only stored when they differ
+# from the renamed metric (see save_analysis)
+_METRIC_COLS = frozenset(_METRIC_EXPORT_COLS) - LEGACY_METRIC_ALIASES.keys()
+# Labelled select list for get_recent_metrics (legacy aliases resolve via COALESCE)
+_METRIC_EXPORT_SELECT = tuple(getattr(SwingMetric, c).label(c) for c in _METRIC_EXPORT_COLS)
+
+# Dialects with INSERT ... ON CONFLICT support for save_feedback
+_UPSERT_INSERTS = {"postgresql": pg_insert, "sqlite": sqlite_insert}
+
+# list_reference_profiles cache: (monotonic timestamp, detached profiles).
+# Profiles only change through create_reference_profile, which invalidates it.
+PROFILES_CACHE_TTL_S = 30.0
+_profiles_cache: Optional[Tuple[float, List[ReferenceProfileDB]]] = None
+
+
+def invalidate_reference_profiles_cache():
+    global _profiles_cache
+    _profiles_cache = None
+
+
+def _drills_json(feedback: SwingFeedback) -> list:
+    """Drills as JSON-ready primitives, dumped once per save."""
+    return [d.model_dump(mode="json") for d in feedback.drills]
+
+
 class AnalysisRepository:
     def __init__(self, db: Session):
         self.db = db
@@ -10,8 +49,9 @@ class AnalysisRepository:
     def save_analysis(self, metadata: SwingAnalysisRequest, metrics: SwingMetrics, 
                      phases: SwingPhases, scores: SwingScores, feedback: SwingFeedback,
                      video_path: str = None, user_id: str = None) -> SwingSession:
-        # Create Session
+        # Create Session (id assigned up front so children can reference it without a flush)
         db_session = SwingSession(
+            id=generate_uuid(),
             handedness=metadata.handedness,
             view=metadata.view,
             club_type=metadata.club_type,
@@ -19,58 +59,30 @@ class AnalysisRepository:
             overall_score=scores.overall_score,
             user_id=user_id
         )
-        self.db.add(db_session)
-        self.db.flush()  # Get the ID
 
-        # Create Metrics - explicitly map all fields to ensure they're saved
-        metrics_dict = metrics.model_dump() if hasattr(metrics, 'model_dump') else metrics.dict()
+        # Create Metrics - every SwingMetrics field that has a matching column
+        metrics_dict = metrics.model_dump(exclude_none=True)
+        # A legacy value is only a duplicate when it equals the renamed metric;
+        # the MHR pipeline overwrites the renamed ones with signed 3D values
+        # while the legacy fields keep the 2D ones, so those are stored
+        # (in the private "_<name>" column attributes behind the aliases).
+        legacy_values = {
+            f"_{legacy}": metrics_dict[legacy]
+            for legacy, current in LEGACY_METRIC_ALIASES.items()
+            if legacy in metrics_dict and metrics_dict[legacy] != metrics_dict.get(current)
+        }
         db_metrics = SwingMetric(
             session_id=db_session.id,
-            tempo_ratio=metrics_dict.get('tempo_ratio'),
-            backswing_duration_ms=metrics_dict.get('backswing_duration_ms'),
-            downswing_duration_ms=metrics_dict.get('downswing_duration_ms'),
-            # New metrics (10 core metrics)
-            chest_turn_top_deg=metrics_dict.get('chest_turn_top_deg'),
-            pelvis_turn_top_deg=metrics_dict.get('pelvis_turn_top_deg'),
-            x_factor_top_deg=metrics_dict.get('x_factor_top_deg'),
-            spine_angle_address_deg=metrics_dict.get('spine_angle_address_deg'),
-            spine_angle_impact_deg=metrics_dict.get('spine_angle_impact_deg'),
-            lead_arm_address_deg=metrics_dict.get('lead_arm_address_deg'),
-            lead_arm_top_deg=metrics_dict.get('lead_arm_top_deg'),
-            lead_arm_impact_deg=metrics_dict.get('lead_arm_impact_deg'),
-            trail_elbow_address_deg=metrics_dict.get('trail_elbow_address_deg'),
-            trail_elbow_top_deg=metrics_dict.get('trail_elbow_top_deg'),
-            trail_elbow_impact_deg=metrics_dict.get('trail_elbow_impact_deg'),
-            knee_flex_left_address_deg=metrics_dict.get('knee_flex_left_address_deg'),
-            knee_flex_right_address_deg=metrics_dict.get('knee_flex_right_address_deg'),
-            head_sway_range=metrics_dict.get('head_sway_range'),
-            early_extension_amount=metrics_dict.get('early_extension_amount'),
-            swing_path_index=metrics_dict.get('swing_path_index'),
-            hand_height_at_top_index=metrics_dict.get('hand_height_at_top_index'),
-            hand_width_at_top_index=metrics_dict.get('hand_width_at_top_index'),
-            head_drop_cm=metrics_dict.get('head_drop_cm'),
-            head_rise_cm=metrics_dict.get('head_rise_cm'),
-            # Backward compatibility (old field names)
-            shoulder_turn_top_deg=metrics_dict.get('shoulder_turn_top_deg'),
-            hip_turn_top_deg=metrics_dict.get('hip_turn_top_deg'),
-            spine_tilt_address_deg=metrics_dict.get('spine_tilt_address_deg'),
-            spine_tilt_impact_deg=metrics_dict.get('spine_tilt_impact_deg'),
-            head_movement_forward_cm=metrics_dict.get('head_movement_forward_cm'),
-            head_movement_vertical_cm=metrics_dict.get('head_movement_vertical_cm'),
-            shaft_lean_impact_deg=metrics_dict.get('shaft_lean_impact_deg'),
-            lead_wrist_flexion_address_deg=metrics_dict.get('lead_wrist_flexion_address_deg'),
-            lead_wrist_flexion_top_deg=metrics_dict.get('lead_wrist_flexion_top_deg'),
-            lead_wrist_flexion_impact_deg=metrics_dict.get('lead_wrist_flexion_impact_deg'),
-            lead_wrist_hinge_top_deg=metrics_dict.get('lead_wrist_hinge_top_deg'),
+            **{k: metrics_dict[k] for k in metrics_dict.keys() & _METRIC_COLS},
+            **legacy_values,
         )
-        self.db.add(db_metrics)
 
         # Create Phases
         db_phases = SwingPhase(
             session_id=db_session.id,
-            **phases.dict()
+            **phases.model_dump()
         )
-        self.db.add(db_phases)
+        new_rows = [db_session, db_metrics, db_phases]
 
         # Create Feedback (if provided)
         if feedback:
@@ -78,10 +90,13 @@ class AnalysisRepository:
                 session_id=db_session.id,
                 summary=feedback.summary,
                 priority_issues=feedback.priority_issues,
-                drills=[d.dict() for d in feedback.drills],
+                drills=_drills_json(feedback),
                 phase_feedback=feedback.phase_feedback
             )
-            self.db.add(db_feedback)
+            new_rows.append(db_feedback)
+
+        # Single unit of work: all inserts go out in one flush/commit
+        self.db.add_all(new_rows)
 
         self.db.commit()
         self.db.refresh(db_session)
@@ -94,34 +109,38 @@ class AnalysisRepository:
         return self.db.query(SwingSession).order_by(SwingSession.created_at.desc()).limit(limit).all()
 
     def delete_session(self, session_id: str) -> bool:
-        session = self.get_session(session_id)
-        if session:
-            self.db.delete(session)
-            self.db.commit()
-            return True
-        return False
+        # Bulk DELETEs in one transaction: no SELECT, no ORM cascade loads.
+        # Children are deleted explicitly since SQLite does not enforce
+        # ON DELETE CASCADE unless foreign_keys is switched on.
+        for child in (SwingMetric, SwingPhase, SwingFeedbackDB):
+            self.db.execute(delete(child).where(child.session_id == session_id))
+        result = self.db.execute(delete(SwingSession).where(SwingSession.id == session_id))
+        self.db.commit()
+        return result.rowcount > 0
 
     def create_reference_profile(self, data: ReferenceProfileCreate) -> ReferenceProfileDB:
         # Convert metrics to targets with +/- 10% tolerance
-        targets = {}
-        metrics_dict = data.metrics.dict()
-        
-        for key, val in metrics_dict.items():
-            # Simple heuristic: +/- 10% or +/- 5 units if val is small
-            # Let's use 10% for now
-            min_val = val * 0.9
-            max_val = val * 1.1
-            
-            # Handle negative values (e.g. head movement)
-            if min_val > max_val:
-                min_val, max_val = max_val, min_val
-                
-            targets[key] = {
-                "min_val": min_val,
-                "max_val": max_val,
-                "ideal_val": val,
+        # Only numeric metrics get a band (skip unset values, labels and flags)
+        metrics_dict = {
+            k: v for k, v in data.metrics.model_dump(exclude_none=True).items()
+            if isinstance(v, (int, float)) and not isinstance(v, bool)
+        }
+        vals = np.fromiter(metrics_dict.values(), dtype=np.float64, count=len(metrics_dict))
+        lo = vals * 0.9
+        hi = vals * 1.1
+        # Negative values (e.g. head movement) flip the band; min/max orders it without a branch
+        min_vals = np.minimum(lo, hi).tolist()
+        max_vals = np.maximum(lo, hi).tolist()
+
+        targets = {
+            key: {
+                "min_val": min_vals[i],
+                "max_val": max_vals[i],
+                "ideal_val": float(val),
                 "weight": 1.0 # Default weight
             }
+            for i, (key, val) in enumerate(metrics_dict.items())
+        }
             
         profile = ReferenceProfileDB(
             name=data.name,
@@ -131,10 +150,21 @@ class AnalysisRepository:
         self.db.add(profile)
         self.db.commit()
         self.db.refresh(profile)
+        invalidate_reference_profiles_cache()
         return profile
 
     def list_reference_profiles(self):
-        return self.db.query(ReferenceProfileDB).all()
+        global _profiles_cache
+        cached = _profiles_cache
+        if cached is not None and time.monotonic() - cached[0] < PROFILES_CACHE_TTL_S:
+            return list(cached[1])
+
+        profiles = self.db.query(ReferenceProfileDB).all()
+        # Detach so a later commit in this session can't expire the shared copies
+        for profile in profiles:
+            self.db.expunge(profile)
+        _profiles_cache = (time.monotonic(), profiles)
+        return list(profiles)
 
     def get_reference_profile(self, profile_id: str) -> ReferenceProfileDB:
         return self.db.query(ReferenceProfileDB).filter(ReferenceProfileDB.id == profile_id).first()
@@ -148,6 +178,66 @@ class AnalysisRepository:
         ).update({"is_personal_best": False})
         self.db.commit()
 
+    def set_personal_best(self, session_id: str, club_type: str, view: str, user_id: str = None):
+        """Move the personal best flag to session_id in one transaction.
+
+        Clears is_personal_best on the matching sessions (scoped to user_id
+        when given) and sets it on the new session, so there is no window
+        where no session holds the flag.
+        """
+        unset = update(SwingSession).where(
+            SwingSession.club_type == club_type,
+            SwingSession.view == view,
+            SwingSession.is_personal_best == True,
+            SwingSession.id != session_id
+        )
+        if user_id is not None:
+            unset = unset.where(SwingSession.user_id == user_id)
+
+        self.db.execute(unset.values(is_personal_best=False).execution_options(synchronize_session=False))
+        self.db.execute(
+            update(SwingSession)
+            .where(SwingSession.id == session_id)
+            .values(is_personal_best=True)
+            .execution_options(synchronize_session=False)
+        )
+        self.db.commit()
+
+    def claim_personal_best(self, session_id: str, club_type: str, view: str, user_id: str = None) -> bool:
+        """Flag session_id as personal best if it outscores every other matching session.
+
+        The comparison runs in the UPDATE itself (correlated NOT EXISTS against
+        the user's club/view sessions, served by ix_swing_user_club_view_score),
+        so no rows are loaded. On success the previous flag is cleared in the
+        same transaction. Returns True if session_id is the new personal best.
+        """
+        other = aliased(SwingSession)
+        outscored = select(other.id).where(
+            other.user_id == user_id,
+            other.club_type == club_type,
+            other.view == view,
+            other.id != session_id,
+            other.overall_score >= SwingSession.overall_score,
+        )
+        claimed = self.db.execute(
+            update(SwingSession)
+            .where(SwingSession.id == session_id, ~outscored.exists())
+            .values(is_personal_best=True)
+            .execution_options(synchronize_session=False)
+        ).rowcount
+        if claimed:
+            unset = update(SwingSession).where(
+                SwingSession.club_type == club_type,
+                SwingSession.view == view,
+                SwingSession.is_personal_best == True,
+                SwingSession.id != session_id
+            )
+            if user_id is not None:
+                unset = unset.where(SwingSession.user_id == user_id)
+            self.db.execute(unset.values(is_personal_best=False).execution_options(synchronize_session=False))
+        self.db.commit()
+        return bool(claimed)
+
     def get_personal_best(self, club_type: str, view: str) -> SwingSession:
         return self.db.query(SwingSession).filter(
             SwingSession.club_type == club_type,
@@ -159,7 +249,8 @@ class AnalysisRepository:
         self, 
         user_id: str, 
         club_type: str = None, 
-        limit: int = 5
+        limit: int = 5,
+        load_metrics: bool = False
     ) -> list:
         """
         Get recent swings for a user, optionally filtered by club type.
@@ -168,6 +259,7 @@ class AnalysisRepository:
             user_id: User's ID
             club_type: Optional club type filter (e.g., 'driver', 'iron')
             limit: Maximum number of swings to return
+            load_metrics: Eager-load SwingSession.metrics in one extra IN query
         
         Returns:
             List of SwingSession objects, newest first.
@@ -178,6 +270,9 @@ class AnalysisRepository:
         
         if club_type:
             query = query.filter(SwingSession.club_type == club_type)
+
+        if load_metrics:
+            query = query.options(selectinload(SwingSession.metrics))
         
         return query.order_by(
             SwingSession.created_at.desc()
@@ -194,56 +289,58 @@ class AnalysisRepository:
         
         Returns list of metric dicts, newest first.
         """
-        sessions = self.get_recent_swings(user_id, club_type, limit)
-        result = []
-        
-        for session in sessions:
-            if session.metrics:
-                # Convert ORM object to dict
-                metrics_dict = {}
-                for col in session.metrics.__table__.columns:
-                    if col.name not in ['id', 'session_id']:
-                        val = getattr(session.metrics, col.name)
-                        if val is not None:
-                            metrics_dict[col.name] = val
-                result.append(metrics_dict)
-        
-        return result
+        # One Core SELECT over the joined tables; no ORM objects are built
+        stmt = (
+            select(*_METRIC_EXPORT_SELECT)
+            .join(SwingSession, SwingMetric.session_id == SwingSession.id)
+            .where(SwingSession.user_id == user_id)
+        )
+        if club_type:
+            stmt = stmt.where(SwingSession.club_type == club_type)
+        stmt = stmt.order_by(SwingSession.created_at.desc()).limit(limit)
+
+        return [
+            {k: v for k, v in row.items() if v is not None}
+            for row in self.db.execute(stmt).mappings()
+        ]
 
     def save_feedback(self, session_id: str, feedback: SwingFeedback) -> SwingFeedbackDB:
         """
         Save or update feedback for a session.
+
+        Uses a single INSERT ... ON CONFLICT (session_id) DO UPDATE on
+        Postgres/SQLite; other dialects fall back to select-then-write.
         """
-        # Check if feedback already exists
-        db_feedback = self.db.query(SwingFeedbackDB).filter(SwingFeedbackDB.session_id == session_id).first()
-        
-        if db_feedback:
-            # Update existing
-            db_feedback.summary = feedback.summary
-            db_feedback.priority_issues = feedback.priority_issues
-            db_feedback.drills = [d.dict() for d in feedback.drills]
-            db_feedback.phase_feedback = feedback.phase_feedback
+        values = {
+            "summary": feedback.summary,
+            "priority_issues": feedback.priority_issues,
+            "drills": _drills_json(feedback),
+            "phase_feedback": feedback.phase_feedback,
+        }
+
+        dialect = self.db.get_bind().dialect.name
+        if dialect in _UPSERT_INSERTS:
+            stmt = _UPSERT_INSERTS[dialect](SwingFeedbackDB).values(session_id=session_id, **values)
+            stmt = stmt.on_conflict_do_update(index_elements=["session_id"], set_=values)
+            db_feedback = self.db.execute(
+                stmt.returning(SwingFeedbackDB),
+                execution_options={"populate_existing": True}
+            ).scalar_one()
         else:
-            # Create new
-            db_feedback = SwingFeedbackDB(
-                session_id=session_id,
-                summary=feedback.summary,
-                priority_issues=feedback.priority_issues,
-                drills=[d.dict() for d in feedback.drills],
-                phase_feedback=feedback.phase_feedback
-            )
-            self.db.add(db_feedback)
-            
-        with open("debug_log.txt", "a") as f:
-            f.write(f"DEBUG: Saving feedback for {session_id}\n")
-            f.write(f"DEBUG: Feedback data: {feedback.dict()}\n")
-            f.write(f"DEBUG: Phase feedback to save: {feedback.phase_feedback}\n")
-            
+            db_feedback = self.db.query(SwingFeedbackDB).filter(SwingFeedbackDB.session_id == session_id).first()
+            if db_feedback:
+                for key, val in values.items():
+                    setattr(db_feedback, key, val)
+            else:
+                db_feedback = SwingFeedbackDB(session_id=session_id, **values)
+                self.db.add(db_feedback)
+
         self.db.commit()
-        self.db.refresh(db_feedback)
-        
-        with open("debug_log.txt", "a") as f:
-             f.write(f"DEBUG: Saved DB Feedback ID: {db_feedback.id}\n")
-             f.write(f"DEBUG: Saved DB Phase Feedback: {db_feedback.phase_feedback}\n")
+
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug(
+                "Saved feedback %s for session %s, phase_feedback=%s",
+                db_feedback.id, session_id, db_feedback.phase_feedback
+            )
 
         return db_feedback
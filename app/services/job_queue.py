@@ -1,8 +1,11 @@
 from sqlalchemy.orm import Session
-from sqlalchemy import func
-from app.models.job import AnalysisJob as Job
-from typing import Optional, Dict, Any
+from sqlalchemy import func, update
+from app.models.db import Job
+from app.models.job import AnalysisJob, JobStatus
+from typing import Optional, Dict, Any, Tuple
 import datetime
+import queue
+import time
 import uuid
 from pydantic import BaseModel
 
@@ -20,45 +23,94 @@ class JobQueueService:
     """
     Service wrapper for job queue operations.
     In a real system, this might wrap Redis/RabbitMQ.
-    Here it wraps our SQL 'Job' table logic.
+    Here it wraps the AnalysisJob rows written by the job routes; queued
+    work is the rows still PENDING.
     """
+    # size() is polled by /health and the queue status endpoint; cache it briefly
+    SIZE_CACHE_TTL_S = 1.0
+
+    def __init__(self):
+        self._pending: "queue.Queue[QueueMessage]" = queue.Queue()
+        self._size_cache: Optional[tuple] = None  # (count, monotonic timestamp)
+        # job_id -> (progress, current_step) for jobs the in-process worker is
+        # running; intermediate progress is not written to the DB
+        self._progress: Dict[str, Tuple[float, str]] = {}
+
     def enqueue(self, message: QueueMessage) -> bool:
-        # In this SQL-based queue, the 'enqueue' is actually just 
-        # ensuring the job exists in the DB with status='queued'.
-        # Since routes_jobs.py already creates the Job record, 
-        # we might just return True or double-check.
-        
-        # However, to support the abstraction that `worker.py` expects 
-        # (polling a queue), we can implement a simple in-memory queue 
-        # OR just rely on the DB polling in the worker.
-        
-        # Given the current worker implementation (worker.py):
-        # It polls the DB: `JobQueue.claim_next_job(db, WORKER_ID)`
-        # So we don't strictly need an in-memory queue for the worker to find it.
-        # But `routes_jobs.py` calls `queue.enqueue(message)`.
-        
-        # So let's make this method a no-op that just returns True, 
-        # because the DB record creation *is* the enqueuing.
+        # The DB record created by the route is the source of truth; this
+        # hands the message to the in-process AnalysisWorker thread so it
+        # wakes immediately instead of polling.
+        self._pending.put_nowait(message)
         return True
 
-    def dequeue(self, timeout: float = 1.0) -> Optional[QueueMessage]:
-        # This method is used by the worker if it uses the queue service abstraction.
-        # But wait, `worker.py` currently imports `JobQueue` static methods directly?
-        # A check of `worker.py` (which I can't see right now but remember) 
-        # suggests it might use `get_queue().dequeue()` OR `JobQueue.claim_next_job`.
-        
-        # Let's support both for safety.
-        return None 
-
-    def size(self) -> int:
-        # Return count of queued jobs
+    def dequeue(self, timeout: Optional[float] = 1.0) -> Optional[QueueMessage]:
+        # Blocks the (single, dedicated) worker thread for up to `timeout`
+        # seconds (forever if None), so an idle worker sleeps instead of
+        # spinning. Returns None on timeout or after wake().
+        # The worker is a plain thread rather than an asyncio task, so the
+        # thread-safe queue.Queue is the right primitive here.
+        try:
+            message = self._pending.get(timeout=timeout)
+        except queue.Empty:
+            return None
+        if message is None:
+            self._pending.task_done()
+        return message
+
+    def wake(self):
+        """Release a dequeue() blocked without timeout (used on worker shutdown)."""
+        self._pending.put_nowait(None)
+
+    def task_done(self):
+        self._pending.task_done()
+
+    def set_progress(self, job_id: str, progress: float, step: str):
+        self._progress[job_id] = (progress, step)
+
+    def get_progress(self, job_id: str) -> Optional[Tuple[float, str]]:
+        """Live (progress, current_step) of a running job, None if not tracked here."""
+        return self._progress.get(job_id)
+
+    def clear_progress(self, job_id: str):
+        self._progress.pop(job_id, None)
+
+    def has_pending(self, db: Optional[Session] = None) -> bool:
+        """Cheap EXISTS check for queued jobs (no COUNT scan)."""
+        if db is not None:
+            return db.query(
+                db.query(AnalysisJob.id).filter(AnalysisJob.status == JobStatus.PENDING).exists()
+            ).scalar()
+
         from app.core.database import SessionLocal
         db = SessionLocal()
         try:
-            return db.query(Job).filter(Job.status == "queued").count()
+            return self.has_pending(db)
         finally:
             db.close()
 
+    def size(self, db: Optional[Session] = None) -> int:
+        # Return count of queued jobs (cached for SIZE_CACHE_TTL_S)
+        now = time.monotonic()
+        if self._size_cache is not None and now - self._size_cache[1] < self.SIZE_CACHE_TTL_S:
+            return self._size_cache[0]
+
+        if db is not None:
+            count = self._count_queued(db)
+        else:
+            from app.core.database import SessionLocal
+            db = SessionLocal()
+            try:
+                count = self._count_queued(db)
+            finally:
+                db.close()
+
+        self._size_cache = (count, now)
+        return count
+
+    @staticmethod
+    def _count_queued(db: Session) -> int:
+        return db.query(func.count(AnalysisJob.id)).filter(AnalysisJob.status == JobStatus.PENDING).scalar()
+
 # Global instance
 _queue_instance = JobQueueService()
 
@@ -82,37 +134,56 @@ class JobQueue:
 
     @staticmethod
     def claim_next_job(db: Session, worker_id: str) -> Optional[Job]:
-        # Simple atomic-ish claim for SQLite/Postgres
-        job = db.query(Job).filter(Job.status == "queued").order_by(Job.created_at.asc()).first()
-        
-        if job:
-            job.status = "processing"
-            job.worker_id = worker_id
-            job.updated_at = datetime.datetime.utcnow()
-            job.attempts += 1
-            db.commit()
-            db.refresh(job)
-            return job
-            
-        return None
+        # Postgres/MySQL: row lock, other workers skip past it instead of blocking.
+        # SQLite ignores FOR UPDATE; the guarded UPDATE below still makes the claim
+        # a compare-and-set, so a worker that loses the race just gets None.
+        job = (
+            db.query(Job)
+            .filter(Job.status == "queued")
+            .order_by(Job.created_at.asc())
+            .with_for_update(skip_locked=True)
+            .first()
+        )
+        if not job:
+            db.rollback()
+            return None
+
+        claimed = db.query(Job).filter(
+            Job.id == job.id,
+            Job.status == "queued"
+        ).update({
+            "status": "processing",
+            "worker_id": worker_id,
+            "updated_at": datetime.datetime.utcnow(),
+            "attempts": func.coalesce(Job.attempts, 0) + 1,
+        }, synchronize_session=False)
+        db.commit()
+
+        if not claimed:
+            return None
+
+        db.refresh(job)
+        return job
 
     @staticmethod
     def complete_job(db: Session, job_id: str, result: Dict[str, Any]):
-        job = db.query(Job).filter(Job.id == job_id).first()
-        if job:
-            job.status = "completed"
-            job.result = result
-            job.updated_at = datetime.datetime.utcnow()
-            db.commit()
+        db.execute(
+            update(Job)
+            .where(Job.id == job_id)
+            .values(status="completed", result=result, updated_at=datetime.datetime.utcnow())
+            .execution_options(synchronize_session=False)
+        )
+        db.commit()
 
     @staticmethod
     def fail_job(db: Session, job_id: str, error: str):
-        job = db.query(Job).filter(Job.id == job_id).first()
-        if job:
-            job.status = "failed"
-            job.error = str(error)
-            job.updated_at = datetime.datetime.utcnow()
-            db.commit()
+        db.execute(
+            update(Job)
+            .where(Job.id == job_id)
+            .values(status="failed", error=str(error), updated_at=datetime.datetime.utcnow())
+            .execution_options(synchronize_session=False)
+        )
+        db.commit()
             
     @staticmethod
     def get_job_status(db: Session, job_id: str) -> Optional[Dict[str, Any]]:
@@ -1,58 +1,180 @@
+import logging
 import os
-from io import BytesIO
+from concurrent.futures import ThreadPoolExecutor
+from operator import attrgetter
+from tempfile import SpooledTemporaryFile
+from xml.sax.saxutils import escape
 from typing import List, Optional
 from reportlab.lib import colors
 from reportlab.lib.pagesizes import A4
-from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle, Image, PageBreak, KeepTogether
+from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle, Image, PageBreak, KeepTogether, KeepInFrame
 from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
 from reportlab.lib.units import inch, cm
 from reportlab.lib.enums import TA_CENTER, TA_LEFT
 
 from app.models.db import SwingSession
 
+logger = logging.getLogger(__name__)
+
+# Palette (parsed once, not per table command)
+BLUE_800 = colors.HexColor('#1e40af')
+GREY_800 = colors.HexColor('#1f2937')
+GREY_200 = colors.HexColor('#e5e7eb')
+GREY_100 = colors.HexColor('#f3f4f6')
+
+# Overall score colour, indexed by thresholds reached: <60, 60-79, 80+
+_SCORE_COLORS = (colors.red, colors.orange, colors.green)
+
+REPORT_SPOOL_MAX_BYTES = 512 * 1024
+
+_MISSING = object()
+
+
+def _formatter(fmt):
+    """Normalize a format spec string or callable to a single callable."""
+    return fmt if callable(fmt) else fmt.format
+
+# Metrics table layout: (category, ((label, attribute, format), ...))
+_METRIC_CATEGORIES = [
+    ("Timing & Tempo", [
+        ("Tempo Ratio", "tempo_ratio", "{:.2f}"),
+        ("Backswing Time", "backswing_duration_ms", lambda x: f"{x/1000:.2f}s"),
+        ("Downswing Time", "downswing_duration_ms", lambda x: f"{x/1000:.2f}s"),
+    ]),
+    ("Rotation", [
+        ("Chest Turn (Top)", "chest_turn_top_deg", "{:.1f}°"),
+        ("Pelvis Turn (Top)", "pelvis_turn_top_deg", "{:.1f}°"),
+        ("X-Factor (Top)", "x_factor_top_deg", "{:.1f}°"),
+        ("Shoulder Turn (Top)", "shoulder_turn_top_deg", "{:.1f}°"),
+        ("Hip Turn (Top)", "hip_turn_top_deg", "{:.1f}°"),
+    ]),
+    ("Posture & Balance", [
+        ("Spine Angle (Address)", "spine_angle_address_deg", "{:.1f}°"),
+        ("Spine Angle (Impact)", "spine_angle_impact_deg", "{:.1f}°"),
+        ("Spine Tilt (Address)", "spine_tilt_address_deg", "{:.1f}°"),
+        ("Spine Tilt (Impact)", "spine_tilt_impact_deg", "{:.1f}°"),
+        ("Finish Balance", "finish_balance", "{:.1f}"),
+        ("Early Extension", "early_extension_amount", "{:.2f}"),
+    ]),
+    ("Arm & Club Structure", [
+        ("Lead Arm (Address)", "lead_arm_address_deg", "{:.1f}°"),
+        ("Lead Arm (Top)", "lead_arm_top_deg", "{:.1f}°"),
+        ("Lead Arm (Impact)", "lead_arm_impact_deg", "{:.1f}°"),
+        ("Trail Elbow (Address)", "trail_elbow_address_deg", "{:.1f}°"),
+        ("Trail Elbow (Top)", "trail_elbow_top_deg", "{:.1f}°"),
+        ("Trail Elbow (Impact)", "trail_elbow_impact_deg", "{:.1f}°"),
+        ("Shaft Lean (Impact)", "shaft_lean_impact_deg", "{:.1f}°"),
+    ]),
+    ("Wrist Angles", [
+        ("Lead Flexion (Address)", "lead_wrist_flexion_address_deg", "{:.1f}°"),
+        ("Lead Flexion (Top)", "lead_wrist_flexion_top_deg", "{:.1f}°"),
+        ("Lead Flexion (Impact)", "lead_wrist_flexion_impact_deg", "{:.1f}°"),
+        ("Lead Hinge (Top)", "lead_wrist_hinge_top_deg", "{:.1f}°"),
+    ]),
+    ("Head Movement", [
+        ("Head Sway Range", "head_sway_range", "{:.2f}"),
+        ("Head Drop", "head_drop_cm", "{:.1f} cm"),
+        ("Head Rise", "head_rise_cm", "{:.1f} cm"),
+        ("Vertical Move", "head_movement_vertical_cm", "{:.1f} cm"),
+        ("Forward Move", "head_movement_forward_cm", "{:.1f} cm"),
+    ]),
+    ("Path & Plane", [
+        ("Swing Path Index", "swing_path_index", "{:.3f}"),
+        ("Hand Height (Top)", "hand_height_at_top_index", "{:.3f}"),
+        ("Hand Width (Top)", "hand_width_at_top_index", "{:.3f}"),
+    ])
+]
+
+_METRIC_SCHEMA = tuple(
+    (category, tuple((name, key, _formatter(fmt)) for name, key, fmt in items))
+    for category, items in _METRIC_CATEGORIES
+)
+# Every metric attribute in table order, fetched in one C-level call
+_METRIC_KEYS = tuple(key for _, items in _METRIC_SCHEMA for _, key, _ in items)
+_GET_METRICS = attrgetter(*_METRIC_KEYS)
+# One header row per category plus one row per metric
+_METRIC_TABLE_MAX_ROWS = sum(1 + len(items) for _, items in _METRIC_SCHEMA)
+
 class ReportService:
+    # Built on first use and shared by every instance (a ReportService is created
+    # per request); styles are read-only while rendering.
+    _shared_styles = None
+    _phase_table_style = TableStyle([
+        ('VALIGN', (0,0), (-1,-1), 'TOP'),
+        ('LEFTPADDING', (0,0), (-1,-1), 6),
+        ('RIGHTPADDING', (0,0), (-1,-1), 6),
+        ('TOPPADDING', (0,0), (-1,-1), 12),
+    ])
+    _phase_col_widths = [3.5*inch, 3.5*inch]
+    # Cell content box: column minus side padding, and under one A4 frame tall
+    _phase_cell_max = (3.5*inch - 12, 9.5*inch)
+
+    # Metrics table scaffold; header/row commands are templates applied per row index
+    _metrics_base_cmds = (
+        ('GRID', (0,0), (-1,-1), 1, GREY_200),
+        ('VALIGN', (0,0), (-1,-1), 'MIDDLE'),
+    )
+    _metrics_header_cmds = (
+        ('SPAN', 0, 1),
+        ('BACKGROUND', 0, 1, BLUE_800),
+        ('TEXTCOLOR', 0, 1, colors.white),
+        ('FONTNAME', 0, 1, 'Helvetica-Bold'),
+        ('ALIGN', 0, 1, 'LEFT'),
+        ('LEFTPADDING', 0, 1, 10),
+    )
+    # Applied once per category block; stripes start grey on odd table rows
+    _metrics_stripes_odd = [GREY_100, colors.white]
+    _metrics_stripes_even = [colors.white, GREY_100]
+
     def __init__(self, storage_dir: str = "videos"):
         self.storage_dir = storage_dir
-        self.styles = getSampleStyleSheet()
-        self._setup_custom_styles()
+        if ReportService._shared_styles is None:
+            styles = getSampleStyleSheet()
+            self._setup_custom_styles(styles)
+            ReportService._shared_styles = styles
+        self.styles = ReportService._shared_styles
 
-    def _setup_custom_styles(self):
-        self.styles.add(ParagraphStyle(
+    @staticmethod
+    def _setup_custom_styles(styles):
+        styles.add(ParagraphStyle(
             name='SectionHeader',
-            parent=self.styles['Heading2'],
+            parent=styles['Heading2'],
             fontSize=16,
             spaceAfter=12,
-            textColor=colors.HexColor('#1e40af')  # Blue-800
+            textColor=BLUE_800
         ))
-        self.styles.add(ParagraphStyle(
+        styles.add(ParagraphStyle(
             name='MetricName',
-            parent=self.styles['Normal'],
+            parent=styles['Normal'],
             fontSize=10,
             textColor=colors.black
         ))
-        self.styles.add(ParagraphStyle(
+        styles.add(ParagraphStyle(
             name='MetricValue',
-            parent=self.styles['Normal'],
+            parent=styles['Normal'],
             fontSize=10,
             alignment=TA_CENTER
         ))
-        self.styles.add(ParagraphStyle(
+        styles.add(ParagraphStyle(
             name='FeedbackText',
-            parent=self.styles['Normal'],
+            parent=styles['Normal'],
             fontSize=10,
             leading=14
         ))
-        self.styles.add(ParagraphStyle(
+        styles.add(ParagraphStyle(
             name='PhaseTitle',
-            parent=self.styles['Heading3'],
+            parent=styles['Heading3'],
             fontSize=12,
             spaceAfter=6,
             alignment=TA_CENTER,
-            textColor=colors.HexColor('#1f2937')
+            textColor=GREY_800
         ))
 
-    def generate_report(self, session: SwingSession) -> BytesIO:
-        buffer = BytesIO()
+    def generate_report(self, session: SwingSession) -> SpooledTemporaryFile:
+        # In memory up to REPORT_SPOOL_MAX_BYTES, then spills to a temp file, so
+        # image-heavy PDFs don't each hold several MB of heap under concurrency.
+        # Caller owns the returned file and should close it.
+        buffer = SpooledTemporaryFile(max_size=REPORT_SPOOL_MAX_BYTES, mode='w+b')
         doc = SimpleDocTemplate(
             buffer,
             pagesize=A4,
@@ -96,7 +218,8 @@ class ReportService:
         return buffer
 
     def _add_score_summary(self, story, session):
-        score_color = colors.green if session.overall_score >= 80 else colors.orange if session.overall_score >= 60 else colors.red
+        score = session.overall_score
+        score_color = _SCORE_COLORS[(score >= 60) + (score >= 80)]
         
         data = [
             ["Overall Score", f"{session.overall_score}/100"],
@@ -119,134 +242,87 @@ class ReportService:
 
     def _add_priority_issues(self, story, session):
         story.append(Paragraph("Priority Issues", self.styles['SectionHeader']))
-        for issue in session.feedback.priority_issues:
-            # Bullet point style
-            p = Paragraph(f"• {issue}", self.styles['FeedbackText'])
-            story.append(p)
-            story.append(Spacer(1, 4))
+        # One Paragraph for all bullets: a single wrap/split instead of 2 flowables per issue
+        bullets = "<br/>".join(f"• {escape(str(issue))}" for issue in session.feedback.priority_issues)
+        story.append(Paragraph(bullets, self.styles['FeedbackText']))
             
     def _add_metrics_table(self, story, session):
         metrics = session.metrics
         if not metrics:
             return
 
-        # Helper to get value
-        def get_val(attr, fmt="{:.1f}"):
-            val = getattr(metrics, attr, None)
-            if val is None:
-                return "-"
-            if isinstance(val, (int, float)):
-                 return fmt.format(val)
-            return str(val)
-
-        # Categories mapping
-        categories = [
-            ("Timing & Tempo", [
-                ("Tempo Ratio", "tempo_ratio", "{:.2f}"),
-                ("Backswing Time", "backswing_duration_ms", lambda x: f"{x/1000:.2f}s"),
-                ("Downswing Time", "downswing_duration_ms", lambda x: f"{x/1000:.2f}s"),
-            ]),
-            ("Rotation", [
-                ("Chest Turn (Top)", "chest_turn_top_deg", "{:.1f}°"),
-                ("Pelvis Turn (Top)", "pelvis_turn_top_deg", "{:.1f}°"),
-                ("X-Factor (Top)", "x_factor_top_deg", "{:.1f}°"),
-                ("Shoulder Turn (Top)", "shoulder_turn_top_deg", "{:.1f}°"),
-                ("Hip Turn (Top)", "hip_turn_top_deg", "{:.1f}°"),
-            ]),
-            ("Posture & Balance", [
-                ("Spine Angle (Address)", "spine_angle_address_deg", "{:.1f}°"),
-                ("Spine Angle (Impact)", "spine_angle_impact_deg", "{:.1f}°"),
-                ("Spine Tilt (Address)", "spine_tilt_address_deg", "{:.1f}°"),
-                ("Spine Tilt (Impact)", "spine_tilt_impact_deg", "{:.1f}°"),
-                ("Finish Balance", "finish_balance", "{:.1f}"),
-                ("Early Extension", "early_extension_amount", "{:.2f}"),
-            ]),
-            ("Arm & Club Structure", [
-                ("Lead Arm (Address)", "lead_arm_address_deg", "{:.1f}°"),
-                ("Lead Arm (Top)", "lead_arm_top_deg", "{:.1f}°"),
-                ("Lead Arm (Impact)", "lead_arm_impact_deg", "{:.1f}°"),
-                ("Trail Elbow (Address)", "trail_elbow_address_deg", "{:.1f}°"),
-                ("Trail Elbow (Top)", "trail_elbow_top_deg", "{:.1f}°"),
-                ("Trail Elbow (Impact)", "trail_elbow_impact_deg", "{:.1f}°"),
-                ("Shaft Lean (Impact)", "shaft_lean_impact_deg", "{:.1f}°"),
-            ]),
-              ("Wrist Angles", [
-                ("Lead Flexion (Address)", "lead_wrist_flexion_address_deg", "{:.1f}°"),
-                ("Lead Flexion (Top)", "lead_wrist_flexion_top_deg", "{:.1f}°"),
-                ("Lead Flexion (Impact)", "lead_wrist_flexion_impact_deg", "{:.1f}°"),
-                 ("Lead Hinge (Top)", "lead_wrist_hinge_top_deg", "{:.1f}°"),
-            ]),
-            ("Head Movement", [
-                 ("Head Sway Range", "head_sway_range", "{:.2f}"),
-                 ("Head Drop", "head_drop_cm", "{:.1f} cm"),
-                 ("Head Rise", "head_rise_cm", "{:.1f} cm"),
-                 ("Vertical Move", "head_movement_vertical_cm", "{:.1f} cm"),
-                 ("Forward Move", "head_movement_forward_cm", "{:.1f} cm"),
-            ]),
-            ("Path & Plane", [
-                ("Swing Path Index", "swing_path_index", "{:.3f}"),
-                 ("Hand Height (Top)", "hand_height_at_top_index", "{:.3f}"),
-                 ("Hand Width (Top)", "hand_width_at_top_index", "{:.3f}"),
-            ])
-        ]
+        # Sized for the full schema up front, written by index, trimmed at the end
+        data = [None] * _METRIC_TABLE_MAX_ROWS
+        header_rows = []
+        blocks = []  # (first, last) metric row of each category
+
+        try:
+            values = iter(_GET_METRICS(metrics))
+        except AttributeError:
+            # Not a full SwingMetric row (older/partial object): probe per key
+            values = (getattr(metrics, key, _MISSING) for key in _METRIC_KEYS)
 
-        data = []
-        
-        # Styles for the table
-        table_styles = [
-            ('GRID', (0,0), (-1,-1), 1, colors.HexColor('#e5e7eb')),
-            ('VALIGN', (0,0), (-1,-1), 'MIDDLE'),
-        ]
-        
         row_idx = 0
-        for category_name, items in categories:
+        for category_name, items in _METRIC_SCHEMA:
+            # Missing attribute -> skip the row; None -> show "-"
+            rows = [(name, fmt, val) for (name, _, fmt), val in zip(items, values)
+                    if val is not _MISSING]
+            # Drop categories with nothing recorded rather than a block of "-"
+            if all(val is None for _, _, val in rows):
+                continue
+
             # Add Category Header Row
-            data.append([category_name.upper(), ""])
-            table_styles.append(('SPAN', (0, row_idx), (1, row_idx)))
-            table_styles.append(('BACKGROUND', (0, row_idx), (1, row_idx), colors.HexColor('#1e40af'))) # Blue-800
-            table_styles.append(('TEXTCOLOR', (0, row_idx), (1, row_idx), colors.white))
-            table_styles.append(('FONTNAME', (0, row_idx), (1, row_idx), 'Helvetica-Bold'))
-            table_styles.append(('ALIGN', (0, row_idx), (1, row_idx), 'LEFT'))
-            table_styles.append(('LEFTPADDING', (0, row_idx), (1, row_idx), 10))
+            data[row_idx] = [category_name.upper(), ""]
+            header_rows.append(row_idx)
             row_idx += 1
+            block_start = row_idx
             
             # Add Metric Rows
-            for name, key, format_func in items:
-                # Check if metric exists (even if None, we might want to show it as "-")
-                # But if the attribute creates an error, skip it.
-                if not hasattr(metrics, key):
-                     continue
-                     
-                val = getattr(metrics, key)
-                
-                # Format value
-                val_str = "-"
-                if val is not None:
-                    if callable(format_func):
-                         val_str = format_func(val)
-                    else:
-                         val_str = format_func.format(val)
-                
-                data.append([name, val_str])
-                
-                # Stripe rows
-                if row_idx % 2 == 1:
-                     table_styles.append(('BACKGROUND', (0, row_idx), (-1, row_idx), colors.HexColor('#f3f4f6'))) # Grey-100
-                else:
-                     table_styles.append(('BACKGROUND', (0, row_idx), (-1, row_idx), colors.white))
-                     
-                table_styles.append(('TEXTCOLOR', (0, row_idx), (-1, row_idx), colors.HexColor('#1f2937'))) # Grey-800
-                table_styles.append(('LEFT', (0, row_idx), (-1, row_idx), 'LEFT'))
-                table_styles.append(('FONTNAME', (0, row_idx), (-1, row_idx), 'Helvetica'))
-                
+            for name, fmt, val in rows:
+                data[row_idx] = [name, fmt(val) if val is not None else "-"]
                 row_idx += 1
+            blocks.append((block_start, row_idx - 1))
 
+        del data[row_idx:]
         if not data:
+            story.append(Paragraph("No metrics were recorded for this swing.", self.styles['Normal']))
             return
 
-        t = Table(data, colWidths=[3*inch, 2*inch], hAlign='LEFT')
-        t.setStyle(TableStyle(table_styles))
-        story.append(t)
+        table_styles = [
+            *self._metrics_base_cmds,
+            *[(cmd, (c0, r), (c1, r), *args) for r in header_rows for cmd, c0, c1, *args in self._metrics_header_cmds],
+        ]
+        for start, end in blocks:
+            stripes = self._metrics_stripes_odd if start % 2 == 1 else self._metrics_stripes_even
+            table_styles += [
+                ('ROWBACKGROUNDS', (0, start), (-1, end), stripes),
+                ('TEXTCOLOR', (0, start), (-1, end), GREY_800),
+                ('FONTNAME', (0, start), (-1, end), 'Helvetica'),
+            ]
+
+        story.append(Table(data, colWidths=[3*inch, 2*inch], hAlign='LEFT', style=table_styles))
+
+    @staticmethod
+    def _prepare_phase_image(image_path: str) -> Optional[Image]:
+        """Build the Image flowable for one keyframe, or None if it is missing/unreadable."""
+        try:
+            # For a JPEG path, Image() reads only the SOF header for its size and
+            # inlines the file at draw time, so this is the one open per keyframe.
+            img = Image(image_path, lazy=1)
+            aspect = img.imageHeight / float(img.imageWidth)
+            
+            # Limit width to 3 inches, calculate height (preserve aspect ratio)
+            img.drawWidth = 3 * inch
+            img.drawHeight = img.drawWidth * aspect
+            img.hAlign = 'CENTER'
+            return img
+        except Exception as e:
+            # Missing keyframe: skip quietly (the failed open was the existence check)
+            if not os.path.exists(image_path):
+                return None
+            # Fallback if image reading fails
+            logger.warning(f"Error reading image {image_path}: {e}")
+            return None
 
     def _add_phase_analysis(self, story, session):
         phases = ["address", "top", "impact", "finish"]
@@ -257,49 +333,33 @@ class ReportService:
         rows = []
         current_row = []
         
-        from reportlab.lib.utils import ImageReader
+        # Resolve the phase feedback JSON once (keys normalized to lower case)
+        fb = session.feedback.phase_feedback if session.feedback else None
+        phase_feedback = {str(k).lower(): v for k, v in fb.items()} if isinstance(fb, dict) else {}
 
-        for phase in phases:
-            image_path = os.path.join(self.storage_dir, f"{session.id}_{phase}.jpg")
-            
-            # Check if file exists
-            if not os.path.exists(image_path):
-                continue
-                
-            try:
-                # Get image dimensions to preserve aspect ratio
-                img_reader = ImageReader(image_path)
-                iw, ih = img_reader.getSize()
-                aspect = ih / float(iw)
-                
-                # Limit width to 3 inches, calculate height
-                display_width = 3 * inch
-                display_height = display_width * aspect
-                
-                img = Image(image_path, width=display_width, height=display_height)
-                img.hAlign = 'CENTER'
-            except Exception as e:
-                # Fallback if image reading fails
-                print(f"Error reading image {image_path}: {e}")
+        # Keyframes are "{storage_dir}/{session_id}_{phase}.jpg"; join the prefix once
+        prefix = os.path.join(os.fspath(self.storage_dir), f"{session.id}_")
+        image_paths = [f"{prefix}{phase}.jpg" for phase in phases]
+
+        # Image header reads overlap on a per-report pool; map() keeps phase order
+        with ThreadPoolExecutor(max_workers=len(image_paths), thread_name_prefix="report-phase") as pool:
+            images = list(pool.map(self._prepare_phase_image, image_paths))
+
+        for phase, img in zip(phases, images):
+            if img is None:
                 continue
             
-            feedback_text = ""
-            if session.feedback and session.feedback.phase_feedback:
-                # Retrieve from JSON dict
-                fb = session.feedback.phase_feedback
-                if isinstance(fb, dict):
-                    feedback_text = fb.get(phase, "")
-            
-            if not feedback_text:
-                feedback_text = "No specific feedback available."
+            feedback_text = phase_feedback.get(phase) or "No specific feedback available."
 
-            # Create a mini-story for this cell
-            cell_content = [
+            # Create a mini-story for this cell; KeepInFrame sizes it to the cell
+            # (shrinking only if it would overflow) so long feedback under a tall
+            # portrait frame can't raise a LayoutError on doc.build
+            cell_content = KeepInFrame(*self._phase_cell_max, content=[
                 Paragraph(phase.title(), self.styles['PhaseTitle']),
                 img,
                 Spacer(1, 6),
                 Paragraph(feedback_text, self.styles['FeedbackText'])
-            ]
+            ], mode='shrink')
             
             current_row.append(cell_content)
             
@@ -334,11 +394,4 @@ class ReportService:
             story.append(Paragraph("No images found for phase analysis.", self.styles['Normal']))
             return
 
-        t = Table(table_data, colWidths=[3.5*inch, 3.5*inch])
-        t.setStyle(TableStyle([
-            ('VALIGN', (0,0), (-1,-1), 'TOP'),
-            ('LEFTPADDING', (0,0), (-1,-1), 6),
-            ('RIGHTPADDING', (0,0), (-1,-1), 6),
-            ('TOPPADDING', (0,0), (-1,-1), 12),
-        ]))
-        story.append(t)
+        story.append(Table(table_data, colWidths=self._phase_col_widths, style=self._phase_table_style))
@@ -1,5 +1,18 @@
+from bisect import bisect_right
+
+import numpy as np
+
 from app.schemas import SwingMetrics, SwingScores
 
+# Skill levels in ascending order; a level's index is the number of
+# overall-score thresholds reached (Intermediate 60+, Advanced 80+, Pro 90+).
+_LEVELS = ("Beginner", "Intermediate", "Advanced", "Pro")
+_LEVEL_THRESHOLDS = (60, 80, 90)
+_LEVEL_BINS = np.array(_LEVEL_THRESHOLDS, dtype=float)
+
+def _level_index(overall_score: float) -> int:
+    return bisect_right(_LEVEL_THRESHOLDS, overall_score)
+
 class SkillAssessmentService:
     def assess_skill_level(self, metrics: SwingMetrics, scores: SwingScores, current_handicap: float = 0.0) -> str:
         """
@@ -20,21 +33,18 @@ class SkillAssessmentService:
         # Intermediate: 60-79
         # Beginner: < 60
         
-        # Also check specific "killer" metrics
-        # e.g. Tempo. Pros are almost always 3.0 +/- 0.2
-        tempo_good = 2.8 <= metrics.tempo_ratio <= 3.2
+        # Specific "killer" metrics (tempo 3.0 +/- 0.2, shoulder turn > 85)
+        # are not part of the level yet, so they aren't evaluated here.
         
-        # Shoulder turn. Pros > 85
-        turn_good = metrics.shoulder_turn_top_deg > 85
-        
-        if overall_score >= 90:
-            return "Pro"
-        elif overall_score >= 80:
-            return "Advanced"
-        elif overall_score >= 60:
-            return "Intermediate"
-        else:
-            return "Beginner"
+        return _LEVELS[_level_index(overall_score)]
+
+    @classmethod
+    def assess_skill_level_batch(cls, overall_scores) -> np.ndarray:
+        """
+        Vectorized assess_skill_level for bulk recomputes.
+        Returns level indices (0..3); map to names with np.take(_LEVELS, idx).
+        """
+        return np.digitize(np.asarray(overall_scores, dtype=float), _LEVEL_BINS)
 
     def update_user_skill(self, user, metrics: SwingMetrics, scores: SwingScores):
         """
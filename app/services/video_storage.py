@@ -1,12 +1,14 @@
 from pathlib import Path
-from typing import Optional
-from app.core.storage import get_storage
+from typing import Iterable, Optional
+from app.core.storage import LocalStorage, get_storage
 
 class VideoStorage:
     """Service for managing video file storage using the core Storage Abstraction"""
     
-    def __init__(self):
-        self.storage = get_storage()
+    def __init__(self, storage_dir: Optional[str] = None):
+        # storage_dir pins a LocalStorage root (e.g. for filesystem tests);
+        # by default use the shared application storage backend.
+        self.storage = LocalStorage(storage_dir) if storage_dir else get_storage()
     
     def _get_key(self, session_id: str) -> str:
         return f"videos/{session_id}.mp4"
@@ -45,3 +47,9 @@ class VideoStorage:
         key = self._get_key(session_id)
         return self.storage.delete(key)
 
+    def delete_many(self, session_ids: Iterable[str]) -> int:
+        """
+        Delete the videos for several sessions (bulk cleanup).
+        Returns the number of files removed.
+        """
+        return self.storage.delete_many(self._get_key(sid) for sid in session_ids)
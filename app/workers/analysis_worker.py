@@ -12,14 +12,77 @@ from datetime import datetime
 from pathlib import Path
 from typing import Optional
 import traceback
+from concurrent.futures import ThreadPoolExecutor, wait
 
-from sqlalchemy.orm import Session
+import cv2
+from sqlalchemy import update
 from app.core.database import SessionLocal
 from app.models.job import AnalysisJob, JobStatus
 from app.services.job_queue import get_queue, QueueMessage
+from app.services.analysis_repository import AnalysisRepository
+from app.services.video_storage import VideoStorage
+from app.schemas import SwingAnalysisRequest
+from pose.types import FramePose, landmarks_from_dicts
+from pose.pose_archive import save_poses_npz
+from pose.swing_detection import SwingDetector
+from pose.metrics import MetricsCalculator
+from pose.yolo_pose_extractor import extract_pose_frames_yolo, get_yolo_model, is_yolo_available
+from reference.reference_profiles import get_reference_profile_for
+from reference.scoring import Scorer
+from services.feedback_service import FeedbackService
 
 logger = logging.getLogger(__name__)
 
+# Optional pose backends: resolved once here instead of on every job
+try:
+    from pose.smpl_extractor import (
+        get_hybrik_extractor,
+        is_smpl_available,
+        smpl_to_mediapipe_format,
+        HYBRIK_AVAILABLE
+    )
+except ImportError:
+    HYBRIK_AVAILABLE = False
+
+try:
+    from pose.legacy_mediapipe import MediaPipeWrapper
+except ImportError:
+    MediaPipeWrapper = None
+
+def _env_flag(name: str) -> bool:
+    return os.getenv(name, "").lower() in ("true", "1", "yes")
+
+# Worker settings, read once at import (app.main loads .env before the worker
+# module is imported)
+DISABLE_HYBRIK = _env_flag("DISABLE_HYBRIK")
+DISABLE_FEEDBACK = _env_flag("DISABLE_FEEDBACK")
+# Process all frames by default for accuracy (impact detection)
+# Set HYBRIK_FRAME_STEP=2 or higher in .env for faster but less accurate processing
+HYBRIK_FRAME_STEP = int(os.getenv("HYBRIK_FRAME_STEP", "1"))
+# Frames per YOLOv8-pose forward pass (lower it if the GPU runs out of memory)
+YOLO_BATCH_SIZE = int(os.getenv("YOLO_BATCH_SIZE", "8"))
+
+# Key frame extraction decodes forward between targets; beyond this many
+# frames a container seek (keyframe + partial GOP decode) is cheaper.
+KEYFRAME_SEEK_GAP = 120
+
+# Key frame JPEGs: quality 85 without Huffman optimization keeps encode on the
+# fast libjpeg-turbo path; the four phase images are encoded in parallel
+# (cv2.imwrite releases the GIL).
+KEYFRAME_JPEG_PARAMS = [cv2.IMWRITE_JPEG_QUALITY, 85, cv2.IMWRITE_JPEG_OPTIMIZE, 0]
+# Threads for the post-analysis file writes (key frame JPEGs, pose archive)
+OUTPUT_WRITE_THREADS = 2
+
+
+def _write_image(path: Path, frame, params) -> bool:
+    """cv2.imwrite to a temp file renamed into place, so readers never see a partial JPEG."""
+    # cv2 picks the encoder from the extension, so keep ".jpg" last
+    tmp_path = path.with_name(f"{path.stem}.tmp{path.suffix}")
+    if not cv2.imwrite(str(tmp_path), frame, params):
+        return False
+    os.replace(tmp_path, path)
+    return True
+
 
 class AnalysisWorker:
     """
@@ -36,6 +99,9 @@ class AnalysisWorker:
         self._thread: Optional[threading.Thread] = None
         self._running = False
         self._hybrik_loaded = False
+        # Key frame and pose files are written here in parallel; the job
+        # still waits for them before it completes
+        self._io_pool: Optional[ThreadPoolExecutor] = None
         
     def start(self):
         """Start the worker thread."""
@@ -52,8 +118,14 @@ class AnalysisWorker:
         """Stop the worker thread gracefully."""
         self._running = False
         if self._thread is not None:
+            get_queue().wake()  # the loop blocks on dequeue() until a job or this arrives
             self._thread.join(timeout=timeout)
             logger.info("Analysis worker stopped")
+        # Release the I/O threads (unless a job is still running past the
+        # join timeout and may yet submit writes)
+        if self._io_pool is not None and not (self._thread is not None and self._thread.is_alive()):
+            self._io_pool.shutdown(wait=True)
+            self._io_pool = None
     
     def is_running(self) -> bool:
         """Check if worker is running."""
@@ -71,8 +143,8 @@ class AnalysisWorker:
         
         while self._running:
             try:
-                # Get next job from queue (blocking with timeout)
-                message = queue.dequeue(timeout=1.0)
+                # Get next job from queue (blocks until enqueue() or stop() wakes us)
+                message = queue.dequeue(timeout=None)
                 
                 if message is None:
                     continue
@@ -92,18 +164,12 @@ class AnalysisWorker:
     def _preload_hybrik(self):
         """Pre-load HybrIK model for faster processing."""
         # Check if HybrIK is disabled via environment variable
-        if os.getenv("DISABLE_HYBRIK", "").lower() in ("true", "1", "yes"):
+        if DISABLE_HYBRIK:
             logger.info("HybrIK disabled via DISABLE_HYBRIK env var")
             self._preload_yolo()  # Pre-load YOLO as fallback
             return
         
         try:
-            from pose.smpl_extractor import (
-                get_hybrik_extractor,
-                is_smpl_available,
-                HYBRIK_AVAILABLE
-            )
-            
             if HYBRIK_AVAILABLE and is_smpl_available():
                 logger.info("Pre-loading HybrIK model in worker thread...")
                 logger.info("(Set DISABLE_HYBRIK=true in .env to use faster YOLO instead)")
@@ -127,8 +193,6 @@ class AnalysisWorker:
     def _preload_yolo(self):
         """Pre-load YOLO model as fallback."""
         try:
-            from pose.yolo_pose_extractor import get_yolo_model, is_yolo_available
-            
             if is_yolo_available():
                 logger.info("Pre-loading YOLOv8-pose model...")
                 model = get_yolo_model()
@@ -141,41 +205,76 @@ class AnalysisWorker:
         except Exception as e:
             logger.warning(f"YOLO preload failed: {e}")
     
+    def _get_io_pool(self) -> ThreadPoolExecutor:
+        """The output write pool, created on first use."""
+        if self._io_pool is None:
+            self._io_pool = ThreadPoolExecutor(max_workers=OUTPUT_WRITE_THREADS, thread_name_prefix="analysis-io")
+        return self._io_pool
+    
+    def _submit_write(self, description: str, fn, *args):
+        """Run a file write on the I/O pool and return its future; the outcome is only logged.
+
+        `fn` returning False (cv2.imwrite's failure value) counts as a failure.
+        """
+        def _log_result(future):
+            try:
+                if future.result() is False:
+                    logger.warning(f"⚠️ Failed to write {description}")
+                else:
+                    logger.info(f"✅ Saved {description}")
+            except Exception as e:
+                logger.error(f"❌ Failed to write {description}: {e}")
+        
+        future = self._get_io_pool().submit(fn, *args)
+        future.add_done_callback(_log_result)
+        return future
+    
+    @staticmethod
+    def _update_job(job_id: str, **values) -> int:
+        """Write job columns in a short-lived session (no connection held between updates)."""
+        with SessionLocal() as db:
+            updated = db.execute(
+                update(AnalysisJob)
+                .where(AnalysisJob.id == job_id)
+                .values(**values)
+                .execution_options(synchronize_session=False)
+            ).rowcount
+            db.commit()
+        return updated
+
     def _process_job(self, message: QueueMessage):
         """Process a single analysis job."""
-        db = SessionLocal()
         start_time = time.time()
         
         try:
-            # Get job from database
-            job = db.query(AnalysisJob).filter(AnalysisJob.id == message.job_id).first()
-            if not job:
+            # Update status to processing (also tells us whether the job exists)
+            if not self._update_job(
+                message.job_id,
+                status=JobStatus.PROCESSING,
+                started_at=datetime.utcnow(),
+                current_step="Initializing...",
+                progress=5.0,
+            ):
                 logger.error(f"Job {message.job_id} not found in database")
                 return
             
-            # Update status to processing
-            job.status = JobStatus.PROCESSING
-            job.started_at = datetime.utcnow()
-            job.current_step = "Initializing..."
-            job.progress = 5.0
-            db.commit()
-            
             # Run the actual analysis
-            session_id, pose_method = self._run_analysis(
-                db, job, message
-            )
+            session_id, pose_method = self._run_analysis(message)
             
             # Mark as completed
-            job.status = JobStatus.COMPLETED
-            job.completed_at = datetime.utcnow()
-            job.session_id = session_id
-            job.pose_method = pose_method
-            job.progress = 100.0
-            job.current_step = "Complete"
-            job.processing_time_ms = (time.time() - start_time) * 1000
-            db.commit()
+            processing_time_ms = (time.time() - start_time) * 1000
+            self._update_job(
+                message.job_id,
+                status=JobStatus.COMPLETED,
+                completed_at=datetime.utcnow(),
+                session_id=session_id,
+                pose_method=pose_method,
+                progress=100.0,
+                current_step="Complete",
+                processing_time_ms=processing_time_ms,
+            )
             
-            logger.info(f"✅ Job {message.job_id} completed in {job.processing_time_ms:.0f}ms")
+            logger.info(f"✅ Job {message.job_id} completed in {processing_time_ms:.0f}ms")
             
         except Exception as e:
             logger.error(f"❌ Job {message.job_id} failed: {e}")
@@ -183,54 +282,46 @@ class AnalysisWorker:
             
             # Mark as failed
             try:
-                job = db.query(AnalysisJob).filter(AnalysisJob.id == message.job_id).first()
-                if job:
-                    job.status = JobStatus.FAILED
-                    job.error_message = str(e)
-                    job.completed_at = datetime.utcnow()
-                    job.processing_time_ms = (time.time() - start_time) * 1000
-                    db.commit()
+                self._update_job(
+                    message.job_id,
+                    status=JobStatus.FAILED,
+                    error_message=str(e),
+                    completed_at=datetime.utcnow(),
+                    processing_time_ms=(time.time() - start_time) * 1000,
+                )
             except Exception:
                 pass
-                
         finally:
-            db.close()
+            get_queue().clear_progress(message.job_id)
     
-    def _run_analysis(self, db: Session, job: AnalysisJob, message: QueueMessage) -> tuple:
+    def _run_analysis(self, message: QueueMessage) -> tuple:
         """
         Run the video analysis pipeline.
         
+        The video is opened once; the capture serves the FPS probe, YOLO pose
+        extraction and the key frame grab.
+        
         Returns: (session_id, pose_method)
         """
-        import cv2
-        from pathlib import Path
-        
-        from pose.legacy_mediapipe import MediaPipeWrapper
-        from pose.swing_detection import SwingDetector
-        from pose.metrics import MetricsCalculator
-        from reference.reference_profiles import get_reference_profile_for
-        from reference.scoring import Scorer
-        from services.feedback_service import FeedbackService
-        from app.services.analysis_repository import AnalysisRepository
-        from app.schemas import SwingAnalysisRequest
-        from app.models.user import User
-        from app.models.db import SwingSession
-        
         video_path = Path(message.video_path)
+        cap = cv2.VideoCapture(str(video_path))
+        try:
+            return self._analyze_video(message, video_path, cap)
+        finally:
+            cap.release()
+    
+    def _analyze_video(self, message: QueueMessage, video_path: Path, cap) -> tuple:
         pose_method = "2D landmark pipeline (MediaPipe-format)"
         
-        # Update progress
+        # Update progress (in memory only; the job row is written on the
+        # PROCESSING transition and the terminal state)
         def update_progress(progress: float, step: str):
-            job.progress = progress
-            job.current_step = step
-            db.commit()
+            get_queue().set_progress(message.job_id, progress, step)
         
         update_progress(10.0, "Reading video...")
         
         # Get FPS
-        cap = cv2.VideoCapture(str(video_path))
         fps = cap.get(cv2.CAP_PROP_FPS)
-        cap.release()
         if fps <= 0:
             fps = 30.0
         
@@ -239,42 +330,23 @@ class AnalysisWorker:
         # Try HybrIK first (unless disabled)
         hybrik_frames = None
         poses = None
-        use_hybrik = self._hybrik_loaded and not os.getenv("DISABLE_HYBRIK", "").lower() in ("true", "1", "yes")
+        use_hybrik = self._hybrik_loaded and (not DISABLE_HYBRIK)
         
         pose_start = time.time()
         if use_hybrik:
             try:
-                from pose.smpl_extractor import (
-                    get_hybrik_extractor,
-                    is_smpl_available,
-                    smpl_to_mediapipe_format,
-                    HYBRIK_AVAILABLE
-                )
-            
                 if HYBRIK_AVAILABLE and is_smpl_available():
                     logger.info("Using HybrIK 3D pose extraction")
                     extractor = get_hybrik_extractor()
                     if extractor and extractor._loaded:
-                        # Process all frames by default for accuracy (impact detection)
-                        # Set HYBRIK_FRAME_STEP=2 or higher in .env for faster but less accurate processing
-                        frame_step = int(os.getenv("HYBRIK_FRAME_STEP", "1"))
-                        hybrik_frames = extractor.extract_video(video_path, frame_step=frame_step)
+                        hybrik_frames = extractor.extract_video(video_path, frame_step=HYBRIK_FRAME_STEP)
                         logger.info(f"⏱️ HybrIK extraction took {time.time() - pose_start:.1f}s")
                         
                         if hybrik_frames:
-                            from pose.types import FramePose, Point3D
                             poses = []
                             for smpl_frame in hybrik_frames:
                                 mp_frame = smpl_to_mediapipe_format(smpl_frame)
-                                landmarks = [
-                                    Point3D(
-                                        x=lm["x"],
-                                        y=lm["y"],
-                                        z=lm["z"],
-                                        visibility=lm["visibility"]
-                                    )
-                                    for lm in mp_frame["landmarks"]
-                                ]
+                                landmarks = landmarks_from_dicts(mp_frame["landmarks"])
                                 pose = FramePose(
                                     frame_index=mp_frame.get("frame_idx", 0),
                                     timestamp_ms=mp_frame.get("timestamp", 0) * 1000.0,
@@ -291,25 +363,14 @@ class AnalysisWorker:
         # Fallback to YOLO (faster than legacy MediaPipe wrapper, better accuracy)
         if poses is None or len(poses) == 0:
             try:
-                from pose.yolo_pose_extractor import extract_pose_frames_yolo, is_yolo_available
-                
                 if is_yolo_available():
                     logger.info("HybrIK not available, trying YOLOv8-pose...")
-                    yolo_frames = extract_pose_frames_yolo(video_path)
+                    yolo_frames = extract_pose_frames_yolo(video_path, batch_size=YOLO_BATCH_SIZE, cap=cap)
                     
                     if yolo_frames:
-                        from pose.types import FramePose, Point3D
                         poses = []
                         for yolo_frame in yolo_frames:
-                            landmarks = [
-                                Point3D(
-                                    x=lm["x"],
-                                    y=lm["y"],
-                                    z=lm["z"],
-                                    visibility=lm["visibility"]
-                                )
-                                for lm in yolo_frame["landmarks"]
-                            ]
+                            landmarks = landmarks_from_dicts(yolo_frame["landmarks"])
                             pose = FramePose(
                                 frame_index=yolo_frame["frame_index"],
                                 timestamp_ms=yolo_frame["timestamp_sec"] * 1000.0,
@@ -323,6 +384,8 @@ class AnalysisWorker:
         
         # Final fallback (legacy): MediaPipe wrapper
         if poses is None or len(poses) == 0:
+            if MediaPipeWrapper is None:
+                raise RuntimeError("No pose extractor available (HybrIK, YOLOv8-pose and the legacy MediaPipe wrapper all failed or are not installed)")
             logger.info("Using 2D pose extraction via legacy MediaPipe wrapper (final fallback)")
             mp_wrapper = MediaPipeWrapper()
             poses = mp_wrapper.extract_poses_from_video(str(video_path))
@@ -363,70 +426,54 @@ class AnalysisWorker:
         
         # Feedback (skip if disabled)
         feedback = None
-        if os.getenv("DISABLE_FEEDBACK", "").lower() in ("true", "1", "yes"):
+        if DISABLE_FEEDBACK:
             logger.info("Skipping feedback generation (DISABLE_FEEDBACK=true)")
         else:
             feedback_start = time.time()
             feedback_service = FeedbackService()
-            feedback = feedback_service.generate_feedback(metrics, scores, handedness, club_type, db, ref_profile)
+            # Drill lookup in a short session; no connection is held during the LLM call
+            with SessionLocal() as db:
+                drills = feedback_service.find_drills(scores, db)
+            feedback = feedback_service.generate_feedback(
+                metrics, scores, handedness, club_type,
+                reference_profile=ref_profile, drills=drills
+            )
             logger.info(f"⏱️ Feedback generation took {time.time() - feedback_start:.1f}s")
         
         update_progress(90.0, "Saving results...")
         
-        # Save to database
-        repo = AnalysisRepository(db)
-        
-        # Get user
-        user = db.query(User).filter(User.id == message.user_id).first()
-        
-        # Save session
-        db_session = repo.save_analysis(
-            metadata=SwingAnalysisRequest(handedness=handedness, view=message.view, club_type=club_type),
-            metrics=metrics,
-            phases=phases,
-            scores=scores,
-            feedback=feedback,
-            user_id=message.user_id,
-        )
-        
-        # Check for personal best (after saving to have session ID)
-        max_score_session = db.query(SwingSession).filter(
-            SwingSession.user_id == message.user_id,
-            SwingSession.club_type == club_type,
-            SwingSession.view == message.view,
-            SwingSession.id != db_session.id  # Exclude current session
-        ).order_by(SwingSession.overall_score.desc()).first()
-        
-        if not max_score_session or scores.overall_score > max_score_session.overall_score:
-            db_session.is_personal_best = True
-            if max_score_session and max_score_session.is_personal_best:
-                max_score_session.is_personal_best = False
-                db.add(max_score_session)
-            db.add(db_session)
-            db.commit()
+        # Save to database (one session for the session rows + personal best)
+        with SessionLocal() as db:
+            repo = AnalysisRepository(db)
+            
+            # Save session
+            db_session = repo.save_analysis(
+                metadata=SwingAnalysisRequest(handedness=handedness, view=message.view, club_type=club_type),
+                metrics=metrics,
+                phases=phases,
+                scores=scores,
+                feedback=feedback,
+                user_id=message.user_id,
+            )
+        
+            # Check for personal best (after saving to have session ID)
+            repo.claim_personal_best(db_session.id, club_type, message.view, user_id=message.user_id)
+
+            session_id = db_session.id
         
         # Save video
-        from app.services.video_storage import VideoStorage
         video_storage = VideoStorage()
-        video_storage.save_video(str(video_path), db_session.id)
+        video_storage.save_video(str(video_path), session_id)
         
-        # Extract and save key frame images
+        # Extract and save key frame images (from the capture opened for
+        # analysis; the saved video has the same content). The JPEG encodes
+        # and the pose archive run in parallel on the I/O pool.
+        writes = []
         try:
-            # Use absolute path for reliability
-            saved_video_path = str(video_storage.get_video_path(db_session.id))
-            abs_video_path = os.path.abspath(saved_video_path)
-            logger.info(f"📸 Extracting key frame images from {abs_video_path}...")
-            
-            cap = cv2.VideoCapture(abs_video_path)
-            
-            # Fallback to original video path if saved video fails to open
-            if not cap.isOpened():
-                logger.warning(f"❌ Failed to open saved video: {abs_video_path}")
-                logger.info(f"🔄 Falling back to original file: {video_path}")
-                cap = cv2.VideoCapture(str(video_path))
+            logger.info(f"📸 Extracting key frame images from {video_path}...")
             
             if not cap.isOpened():
-                logger.error("❌ Failed to open video file (both saved and original failed)")
+                logger.error(f"❌ Failed to open video file: {video_path}")
             else:
                 # Map phase name to frame index
                 key_frame_indices = {
@@ -436,63 +483,86 @@ class AnalysisWorker:
                     "finish": phases.finish_frame
                 }
                 
-                for phase_name, frame_idx in key_frame_indices.items():
-                    if frame_idx is not None and frame_idx >= 0:
-                        cap.set(cv2.CAP_PROP_POS_FRAMES, frame_idx)
+                # Walk the targets in frame order, decoding forward with grab()
+                # (no colour convert/copy) instead of a seek per phase; every
+                # CAP_PROP_POS_FRAMES seek rewinds to a keyframe and re-decodes.
+                # Only seek when the next target is far ahead.
+                targets = sorted(
+                    (frame_idx, phase_name)
+                    for phase_name, frame_idx in key_frame_indices.items()
+                    if frame_idx is not None and frame_idx >= 0
+                )
+                # Pose extraction may have read the capture to the end
+                if cap.get(cv2.CAP_PROP_POS_FRAMES) != 0:
+                    cap.set(cv2.CAP_PROP_POS_FRAMES, 0)
+                cur = 0  # index of the frame the next read()/grab() returns
+                last_idx, frame = None, None
+                for frame_idx, phase_name in targets:
+                    if frame_idx != last_idx:
+                        if frame_idx - cur > KEYFRAME_SEEK_GAP:
+                            cap.set(cv2.CAP_PROP_POS_FRAMES, frame_idx)
+                            cur = frame_idx
+                        while cur < frame_idx and cap.grab():
+                            cur += 1
                         ret, frame = cap.read()
-                        if ret:
-                            # Save image
-                            image_filename = f"{db_session.id}_{phase_name}.jpg"
-                            image_path = Path("videos") / image_filename
-                            cv2.imwrite(str(image_path), frame)
-                            logger.info(f"✅ Saved {phase_name} image to {image_path}")
-                        else:
-                            logger.warning(f"⚠️ Could not read frame {frame_idx} for {phase_name}")
-                
-                cap.release()
+                        cur += 1
+                        last_idx = frame_idx
+                        if not ret:
+                            frame = None
+                    if frame is not None:
+                        # Save image
+                        image_filename = f"{session_id}_{phase_name}.jpg"
+                        image_path = Path("videos") / image_filename
+                        writes.append(self._submit_write(
+                            f"{phase_name} image to {image_path}",
+                            _write_image, image_path, frame, KEYFRAME_JPEG_PARAMS
+                        ))
+                    else:
+                        logger.warning(f"⚠️ Could not read frame {frame_idx} for {phase_name}")
         except Exception as e:
             logger.error(f"❌ Failed to extract key frame images: {e}")
             traceback.print_exc()
         
         # Save poses for skeleton visualization
-        import json
-        poses_path = Path("videos") / f"{db_session.id}_poses.json"
-        poses_data = [
-            {
-                "frame_index": pose.frame_index,
-                "timestamp_ms": pose.timestamp_ms,
-                "landmarks": [
-                    {"x": lm.x, "y": lm.y, "z": lm.z, "visibility": lm.visibility}
-                    for lm in pose.landmarks
-                ],
-                "smpl_pose": pose.smpl_pose
-            }
-            for pose in poses
-        ]
-        with open(poses_path, "w") as f:
-            json.dump(poses_data, f)
-        logger.info(f"Saved {len(poses_data)} poses to {poses_path}")
-        
-        return db_session.id, pose_method
+        # Quantized .npz archive; several times smaller than the old JSON dump.
+        poses_path = Path("videos") / f"{session_id}_poses.npz"
+        poses_write = self._submit_write(f"{len(poses)} poses to {poses_path}", save_poses_npz, poses_path, poses)
+        writes.append(poses_write)
+        
+        # The session page fetches these files as soon as the job reports
+        # COMPLETED, so they must be on disk before we return. The writes only
+        # overlap each other, not the rest of the job.
+        wait(writes)
+        # Without the poses the session has no skeleton: fail the job (a
+        # missing key frame image stays non-fatal)
+        poses_write.result()
+        
+        return session_id, pose_method
 
 
 # Global worker instance
 _worker: Optional[AnalysisWorker] = None
+_worker_lock = threading.Lock()
 
 
 def get_worker() -> AnalysisWorker:
     """Get the global worker instance."""
     global _worker
-    if _worker is None:
-        _worker = AnalysisWorker()
-    return _worker
+    worker = _worker  # fast path: single global read, no lock
+    if worker is None:
+        with _worker_lock:
+            if _worker is None:
+                _worker = AnalysisWorker()
+            worker = _worker
+    return worker
 
 
 def start_worker():
     """Start the global worker."""
     worker = get_worker()
-    if not worker.is_running():
-        worker.start()
+    with _worker_lock:
+        if not worker.is_running():
+            worker.start()
 
 
 def stop_worker():
@@ -1,16 +1,53 @@
 
+import os
+import sys
 import cv2
 import time
 import numpy as np
+import torch
+from functools import lru_cache
 from pathlib import Path
 from ultralytics import YOLO
-from scipy.signal import savgol_filter
+from scipy.signal import savgol_coeffs
+
+# Add project root to path (for the shared pose helpers)
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from pose.frame_prefetcher import prefetch_frames
+
+# Numba compiles the scalar phase-detection scans; plain Python otherwise
+try:
+    from numba import njit
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+    def njit(*args, **kwargs):
+        return lambda fn: fn
+
+
+@lru_cache(maxsize=None)
+def _savgol_kernels(window_size: int, poly_order: int):
+    """
+    Savitzky-Golay weights for one (window, order) pair, fitted once.
+    
+    Returns the interior convolution kernel plus the matrices that evaluate
+    the first/last window's polynomial at the edge samples, as
+    savgol_filter(mode='interp') does.
+    """
+    half = window_size // 2
+    kernel = savgol_coeffs(window_size, poly_order)
+    left = np.array([savgol_coeffs(window_size, poly_order, pos=i, use='dot') for i in range(half)])
+    right = np.array([savgol_coeffs(window_size, poly_order, pos=half + 1 + i, use='dot') for i in range(half)])
+    return kernel, left.reshape(half, window_size), right.reshape(half, window_size)
 
 
 def smooth_savgol(data: list, window_size: int = 7, poly_order: int = 2) -> np.ndarray:
     """
     Apply Savitzky-Golay filter for smoothing.
     Better at preserving sharp transitions than moving average.
+    
+    Same result as scipy's savgol_filter, with the filter weights cached per
+    (window_size, poly_order) instead of refitted on every call.
     """
     if len(data) < window_size:
         return np.array(data)
@@ -19,7 +56,102 @@ def smooth_savgol(data: list, window_size: int = 7, poly_order: int = 2) -> np.n
     if window_size % 2 == 0:
         window_size += 1
     
-    return savgol_filter(data, window_size, poly_order)
+    data = np.asarray(data, dtype=np.float64)
+    if len(data) < window_size:
+        return data
+    kernel, left, right = _savgol_kernels(window_size, poly_order)
+    return np.concatenate((
+        left @ data[:window_size],
+        np.convolve(data, kernel, mode='valid'),
+        right @ data[-window_size:],
+    ))
+
+
+@njit(cache=True)
+def _savgol_into(x, out, coeffs, left, right):
+    """Savitzky-Golay filter x into out (dot-ordered coeffs, interp edges)."""
+    n = x.shape[0]
+    window = coeffs.shape[0]
+    half = window // 2
+    for i in range(half):
+        acc_l = 0.0
+        acc_r = 0.0
+        for k in range(window):
+            acc_l += left[i, k] * x[k]
+            acc_r += right[i, k] * x[n - window + k]
+        out[i] = acc_l
+        out[n - half + i] = acc_r
+    for i in range(half, n - half):
+        acc = 0.0
+        for k in range(window):
+            acc += coeffs[k] * x[i - half + k]
+        out[i] = acc
+
+
+@njit(cache=True)
+def _phase_signals(y, c7, l7, r7, c5, l5, r5):
+    """smooth_y (7-tap), its np.gradient velocity and the 5-tap smoothed velocity in one kernel."""
+    n = y.shape[0]
+    smooth_y = np.empty(n)
+    velocity = np.empty(n)
+    smooth_velocity = np.empty(n)
+    _savgol_into(y, smooth_y, c7, l7, r7)
+    # np.gradient: one-sided at the ends, central differences inside
+    velocity[0] = smooth_y[1] - smooth_y[0]
+    velocity[n - 1] = smooth_y[n - 1] - smooth_y[n - 2]
+    for i in range(1, n - 1):
+        velocity[i] = 0.5 * (smooth_y[i + 1] - smooth_y[i - 1])
+    _savgol_into(velocity, smooth_velocity, c5, l5, r5)
+    return smooth_y, velocity, smooth_velocity
+
+
+def phase_signals(wrist_ys: np.ndarray):
+    """
+    (smooth_y, velocity, smooth_velocity) for phase detection.
+    
+    With Numba the three passes run in one compiled kernel writing into
+    preallocated arrays; otherwise the NumPy/SciPy path is used.
+    """
+    if not NUMBA_AVAILABLE:
+        smooth_y = smooth_savgol(wrist_ys, window_size=7, poly_order=2)
+        velocity = np.gradient(smooth_y)
+        return smooth_y, velocity, smooth_savgol(velocity, window_size=5, poly_order=2)
+    
+    k7, l7, r7 = _savgol_kernels(7, 2)
+    k5, l5, r5 = _savgol_kernels(5, 2)
+    # savgol_coeffs' default kernel is convolution-ordered; the kernel wants dot order
+    return _phase_signals(wrist_ys, k7[::-1].copy(), l7, r7, k5[::-1].copy(), l5, r5)
+
+
+@njit(cache=True)
+def _find_top_frame(smooth_y, velocity, threshold_rise):
+    """First velocity zero-crossing (neg -> pos) after a significant rise; 0 if none."""
+    address_y = smooth_y[0]
+    total_frames = smooth_y.shape[0]
+    for i in range(5, total_frames - 5):
+        # Check for significant rise from address
+        if address_y - smooth_y[i] > threshold_rise:
+            # Look for velocity zero-crossing (neg -> pos)
+            if velocity[i-1] <= 0 and velocity[i] > 0:
+                # Confirm it's a real peak by checking surrounding values
+                if smooth_y[i] < smooth_y[i-3] and smooth_y[i] < smooth_y[i+3]:
+                    return i
+    return 0
+
+
+@njit(cache=True)
+def _find_impact_by_position(smooth_y, search_start, search_end):
+    """Frame of maximum Y in the downswing window, stopping once hands rise again."""
+    max_y_downswing = -1.0
+    impact_by_position = search_start
+    for i in range(search_start, search_end):
+        if smooth_y[i] > max_y_downswing:
+            max_y_downswing = smooth_y[i]
+            impact_by_position = i
+        # Early exit: if hands have risen significantly, we've passed impact
+        elif max_y_downswing > 0 and max_y_downswing - smooth_y[i] > 0.04:
+            break
+    return impact_by_position
 
 
 def detect_phases_improved(wrist_ys: list, fps: float = 30.0) -> dict:
@@ -43,33 +175,21 @@ def detect_phases_improved(wrist_ys: list, fps: float = 30.0) -> dict:
     if total_frames < 10:
         return {"address": 0, "top": 0, "impact": 0, "finish": 0}
     
-    # 1. Apply Savgol smoothing (better for preserving peaks)
-    smooth_y = smooth_savgol(wrist_ys, window_size=7, poly_order=2)
-    
-    # 2. Calculate velocity and acceleration
-    velocity = np.gradient(smooth_y)
-    acceleration = np.gradient(velocity)
+    # One contiguous float64 array for the compiled scans below
+    wrist_ys = np.ascontiguousarray(wrist_ys, dtype=np.float64)
     
+    # 1. Apply Savgol smoothing (better for preserving peaks)
+    # 2. Calculate velocity
     # Also smooth the velocity for cleaner peak detection
-    smooth_velocity = smooth_savgol(velocity, window_size=5, poly_order=2)
+    smooth_y, velocity, smooth_velocity = phase_signals(wrist_ys)
     
     # === DETECT TOP OF BACKSWING ===
     # Find first significant local minimum (hands at highest point)
     # Velocity crosses from negative (going up) to positive (going down)
     
-    address_y = smooth_y[0]
     threshold_rise = 0.08  # Must rise at least 8% from start
     
-    top_frame = 0
-    for i in range(5, total_frames - 5):
-        # Check for significant rise from address
-        if address_y - smooth_y[i] > threshold_rise:
-            # Look for velocity zero-crossing (neg -> pos)
-            if velocity[i-1] <= 0 and velocity[i] > 0:
-                # Confirm it's a real peak by checking surrounding values
-                if smooth_y[i] < smooth_y[i-3] and smooth_y[i] < smooth_y[i+3]:
-                    top_frame = i
-                    break
+    top_frame = _find_top_frame(smooth_y, velocity, threshold_rise)
     
     # Fallback: find global minimum in first 60% of video
     if top_frame == 0:
@@ -83,11 +203,8 @@ def detect_phases_improved(wrist_ys: list, fps: float = 30.0) -> dict:
     address_frame = 0
     search_start = max(0, top_frame - int(fps * 2))  # Up to 2 seconds before top
     
-    max_y_before_top = -1.0
-    for i in range(search_start, top_frame):
-        if smooth_y[i] > max_y_before_top:
-            max_y_before_top = smooth_y[i]
-            address_frame = i
+    if search_start < top_frame:
+        address_frame = search_start + int(np.argmax(smooth_y[search_start:top_frame]))
     
     # === DETECT IMPACT ===
     # Impact is when hands reach their LOWEST point (maximum Y) in the downswing
@@ -104,16 +221,7 @@ def detect_phases_improved(wrist_ys: list, fps: float = 30.0) -> dict:
         search_end = min(total_frames - 1, search_start + 15)
     
     # Method 1: Find maximum Y (hands lowest)
-    max_y_downswing = -1.0
-    impact_by_position = search_start
-    
-    for i in range(search_start, search_end):
-        if smooth_y[i] > max_y_downswing:
-            max_y_downswing = smooth_y[i]
-            impact_by_position = i
-        # Early exit: if hands have risen significantly, we've passed impact
-        elif max_y_downswing > 0 and max_y_downswing - smooth_y[i] > 0.04:
-            break
+    impact_by_position = _find_impact_by_position(smooth_y, search_start, search_end)
     
     # Method 2: Find peak velocity (maximum positive velocity = fastest descent)
     velocity_window = smooth_velocity[search_start:search_end]
@@ -142,12 +250,10 @@ def detect_phases_improved(wrist_ys: list, fps: float = 30.0) -> dict:
     # Hands reach highest point (minimum Y) after impact
     
     finish_frame = total_frames - 1
-    min_y_after_impact = 1.0
+    search_start = impact_frame + 3
     
-    for i in range(impact_frame + 3, total_frames):
-        if smooth_y[i] < min_y_after_impact:
-            min_y_after_impact = smooth_y[i]
-            finish_frame = i
+    if search_start < total_frames:
+        finish_frame = search_start + int(np.argmin(smooth_y[search_start:]))
     
     # === SAFETY CHECKS ===
     # Ensure chronological order
@@ -172,10 +278,59 @@ def detect_phases_improved(wrist_ys: list, fps: float = 30.0) -> dict:
     }
 
 
-def run_experiment(video_path: str):
+def mean_wrist_ys(wrists: np.ndarray) -> np.ndarray:
+    """
+    Average Y of the valid wrists per frame.
+    
+    Args:
+        wrists: (frames, 2, 2) normalized left/right wrist xy; a wrist is valid
+            when both coordinates are > 0
+        
+    Returns:
+        (frames,) wrist Y (0 is top, 1 is bottom). Frames with no valid wrist
+        repeat the previous frame's value (0.5 before the first valid one).
+    """
+    valid_wrist = (wrists > 0).all(axis=2)
+    counts = valid_wrist.sum(axis=1)
+    ys = (wrists[..., 1] * valid_wrist).sum(axis=1) / np.maximum(counts, 1)
+    
+    # Forward-fill frames without a valid wrist
+    valid = counts > 0
+    last_valid = np.maximum.accumulate(np.where(valid, np.arange(len(ys)), -1))
+    return np.where(last_valid >= 0, ys[np.maximum(last_valid, 0)], 0.5)
+
+
+def load_pose_model(weights: str, batch_size: int):
+    """
+    Load YOLOv8-pose, preferring a TensorRT FP16 engine exported next to the
+    weights. The engine is built on the first CUDA run for each batch size
+    (its max batch is fixed at export, so the size is part of the file name)
+    and reused afterwards; without CUDA (or if the export fails) the .pt
+    weights are used.
+    """
+    weights_path = Path(weights)
+    engine_path = weights_path.with_name(f"{weights_path.stem}_b{batch_size}.engine")
+    if engine_path.exists():
+        return YOLO(str(engine_path), task='pose')
+    
+    model = YOLO(weights)
+    if torch.cuda.is_available():
+        try:
+            print(f"Exporting {weights} to a TensorRT FP16 engine for batch size {batch_size}...")
+            # dynamic: the last batch of a video is usually smaller
+            exported = model.export(format='engine', half=True, batch=batch_size, dynamic=True)
+            # Export always writes <stem>.engine; keep it under the batch-size key
+            os.replace(exported, engine_path)
+            return YOLO(str(engine_path), task='pose')
+        except Exception as e:
+            print(f"TensorRT export failed, using {weights}: {e}")
+    return model
+
+
+def run_experiment(video_path: str, batch_size: int = 16):
     print(f"Loading YOLOv8-pose model...")
     # Use 'yolov8n-pose.pt' for maximum speed, 'yolov8m-pose.pt' for balance
-    model = YOLO('yolov8n-pose.pt') 
+    model = load_pose_model('yolov8n-pose.pt', batch_size)
     
     cap = cv2.VideoCapture(video_path)
     if not cap.isOpened():
@@ -185,7 +340,7 @@ def run_experiment(video_path: str):
     # Get video FPS
     video_fps = cap.get(cv2.CAP_PROP_FPS) or 30.0
 
-    wrist_ys = []  # Y coordinate of wrists (average)
+    wrists = []  # (2, 2) left/right wrist xy tensor per frame
     
     # YOLO Keypoint Indices (COCO format):
     # 9: left_wrist, 10: right_wrist
@@ -195,50 +350,44 @@ def run_experiment(video_path: str):
     print("Processing video frames...")
     start_time = time.time()
     
-    frame_count = 0
-    while True:
-        ret, frame = cap.read()
-        if not ret:
-            break
-            
-        # Run inference
-        results = model(frame, verbose=False)
-        
-        # Extract keypoints
-        if results and len(results) > 0:
-            keypoints = results[0].keypoints.xyn.cpu().numpy()
-            
-            if len(keypoints) > 0 and len(keypoints[0]) > 10:
-                kpts = keypoints[0]
-                
-                l_wrist = kpts[IDX_L_WRIST]
-                r_wrist = kpts[IDX_R_WRIST]
-                
-                # Average Y (0 is top, 1 is bottom)
-                valid_cnt = 0
-                y_sum = 0
-                
-                if l_wrist[0] > 0 and l_wrist[1] > 0:
-                    y_sum += l_wrist[1]
-                    valid_cnt += 1
-                if r_wrist[0] > 0 and r_wrist[1] > 0:
-                    y_sum += r_wrist[1]
-                    valid_cnt += 1
-                    
-                if valid_cnt > 0:
-                    wrist_ys.append(y_sum / valid_cnt)
-                else:
-                    wrist_ys.append(wrist_ys[-1] if wrist_ys else 0.5)
-            else:
-                wrist_ys.append(wrist_ys[-1] if wrist_ys else 0.5)
+    def append_wrists(results):
+        # Extract keypoints (one Results per image in the batch); the wrist
+        # slice stays on the model's device until the whole video is done
+        keypoints = results.keypoints.xyn
+        if keypoints.shape[0] > 0 and keypoints.shape[1] > 10:
+            wrists.append(keypoints[0, IDX_L_WRIST:IDX_R_WRIST + 1])
         else:
-            wrist_ys.append(wrist_ys[-1] if wrist_ys else 0.5)
-             
-        frame_count += 1
-        if frame_count % 10 == 0:
-            print(f"Processed {frame_count} frames...", end='\r')
+            wrists.append(keypoints.new_zeros((2, 2)))  # fails the > 0 validity test
+    
+    # Frames are decoded on a background thread while the previous batch runs;
+    # one forward pass per batch (Ultralytics accepts a list of images)
+    frame_count = 0
+    batch = []
+    # Progress goes to stderr about 100 times per video, not once per batch
+    report_every = max(10, int(cap.get(cv2.CAP_PROP_FRAME_COUNT)) // 100)
+    next_report = report_every
+    for _, frame in prefetch_frames(cap, maxsize=2 * batch_size):
+        batch.append(frame)
+        if len(batch) < batch_size:
+            continue
+        for results in model(batch, verbose=False):
+            append_wrists(results)
+        frame_count += len(batch)
+        batch.clear()
+        if frame_count >= next_report:
+            sys.stderr.write(f"Processed {frame_count} frames...\r")
+            sys.stderr.flush()
+            next_report = frame_count + report_every
+    if batch:
+        for results in model(batch, verbose=False):
+            append_wrists(results)
+        frame_count += len(batch)
     
     cap.release()
+    
+    # One device -> host copy for the whole video
+    wrists = torch.stack(wrists).cpu().numpy() if wrists else np.empty((0, 2, 2))
+    wrist_ys = mean_wrist_ys(wrists.astype(np.float64))
             
     end_time = time.time()
     duration = end_time - start_time
@@ -7,7 +7,7 @@ normalized scoring (0-1) with LOW/OK/HIGH flags.
 
 import json
 import os
-from typing import Dict, Any, Optional, Literal
+from typing import Dict, Any, Optional, Literal, Tuple
 from functools import lru_cache
 
 
@@ -30,20 +30,8 @@ def _load_club_targets() -> Dict[str, Dict[str, list]]:
         return {}
 
 
-def get_metric_range(
-    metric_name: str,
-    club_type: str
-) -> Optional[tuple]:
-    """
-    Get the [low, high] acceptable range for a metric and club type.
-    
-    Args:
-        metric_name: Name of the metric (e.g., 'x_factor_top_deg')
-        club_type: Club type (e.g., 'driver', 'mid_iron', 'wedge')
-    
-    Returns:
-        Tuple (low, high) or None if not found.
-    """
+def _club_targets_for(club_type: str) -> Optional[Dict[str, list]]:
+    """Targets for a club type, applying the iron/wood/driver/mid_iron fallbacks."""
     targets = _load_club_targets()
     
     # Normalize club type
@@ -64,61 +52,60 @@ def get_metric_range(
             # Default to mid_iron as generic fallback
             club_targets = targets.get("mid_iron", targets.get("iron"))
     
-    if club_targets is None:
-        return None
-    
-    range_val = club_targets.get(metric_name)
-    if range_val is None or len(range_val) != 2:
-        return None
-    
-    return (range_val[0], range_val[1])
+    return club_targets
 
 
-def normalize_metric(
-    value: float,
+@lru_cache(maxsize=32)
+def _resolve_club(club_type: str) -> Dict[str, Tuple[float, float, float, float, float]]:
+    """
+    Metric ranges for a club type, resolved once.
+    
+    Returns:
+        Dict of metric_name -> (low, high, center, half_width, inv_half_width);
+        inv_half_width is 0.0 for degenerate ranges. Treat as read-only.
+    """
+    resolved = {}
+    for name, range_val in (_club_targets_for(club_type) or {}).items():
+        if not isinstance(range_val, (list, tuple)) or len(range_val) != 2:
+            continue
+        low, high = range_val
+        half_width = (high - low) / 2
+        inv_half_width = 1.0 / half_width if half_width >= 0.001 else 0.0
+        resolved[name] = (low, high, (low + high) / 2, half_width, inv_half_width)
+    return resolved
+
+
+@lru_cache(maxsize=512)
+def get_metric_range(
     metric_name: str,
     club_type: str
-) -> Dict[str, Any]:
+) -> Optional[tuple]:
     """
-    Normalize a metric value based on club-specific targets.
-    
-    Scoring:
-    - 0.0 = far outside range
-    - 0.5 = at range boundary
-    - 1.0 = at center of range
+    Get the [low, high] acceptable range for a metric and club type.
     
     Args:
-        value: The metric value to normalize
-        metric_name: Name of the metric
-        club_type: Club type for lookup
+        metric_name: Name of the metric (e.g., 'x_factor_top_deg')
+        club_type: Club type (e.g., 'driver', 'mid_iron', 'wedge')
     
     Returns:
-        Dict with:
-        - score: 0.0 to 1.0 normalized score
-        - flag: "LOW" | "OK" | "HIGH"
-        - range: [low, high] if found
+        Tuple (low, high) or None if not found.
     """
+    entry = _resolve_club(club_type).get(metric_name)
+    if entry is None:
+        return None
+    
+    return (entry[0], entry[1])
+
+
+def _normalize_value(value: float, entry: tuple) -> Dict[str, Any]:
+    """normalize_metric's result for a non-None value and a _resolve_club entry."""
+    low, high, center, half_width, inv_half_width = entry
     result: Dict[str, Any] = {
         "score": None,
         "flag": None,
-        "range": None,
+        "range": [low, high],
     }
     
-    if value is None:
-        return result
-    
-    range_val = get_metric_range(metric_name, club_type)
-    if range_val is None:
-        # No range defined, can't normalize
-        return result
-    
-    low, high = range_val
-    result["range"] = [low, high]
-    
-    # Calculate where value falls relative to range
-    center = (low + high) / 2
-    half_width = (high - low) / 2
-    
     if half_width < 0.001:
         # Degenerate range
         if abs(value - center) < 0.001:
@@ -131,7 +118,7 @@ def normalize_metric(
     
     # Distance from center, normalized
     dist_from_center = abs(value - center)
-    normalized_dist = dist_from_center / half_width
+    normalized_dist = dist_from_center * inv_half_width
     
     # Determine flag
     if value < low:
@@ -152,8 +139,7 @@ def normalize_metric(
         score = 1.0 - (normalized_dist * 0.5)
     else:
         # Outside range: 0.0 to 0.5
-        excess = dist_from_center - half_width
-        excess_normalized = excess / half_width
+        excess_normalized = normalized_dist - 1.0
         score = max(0.0, 0.5 - (excess_normalized * 0.25))
     
     result["score"] = round(score, 3)
@@ -161,6 +147,38 @@ def normalize_metric(
     return result
 
 
+def normalize_metric(
+    value: float,
+    metric_name: str,
+    club_type: str
+) -> Dict[str, Any]:
+    """
+    Normalize a metric value based on club-specific targets.
+    
+    Scoring:
+    - 0.0 = far outside range
+    - 0.5 = at range boundary
+    - 1.0 = at center of range
+    
+    Args:
+        value: The metric value to normalize
+        metric_name: Name of the metric
+        club_type: Club type for lookup
+    
+    Returns:
+        Dict with:
+        - score: 0.0 to 1.0 normalized score
+        - flag: "LOW" | "OK" | "HIGH"
+        - range: [low, high] if found
+    """
+    entry = _resolve_club(club_type).get(metric_name) if value is not None else None
+    if entry is None:
+        # No value, or no range defined: can't normalize
+        return {"score": None, "flag": None, "range": None}
+    
+    return _normalize_value(value, entry)
+
+
 def normalize_metrics_batch(
     metrics: Dict[str, float],
     club_type: str,
@@ -186,10 +204,15 @@ def normalize_metrics_batch(
         club_targets = targets.get(club_type.lower(), targets.get("iron", {}))
         metric_names = [k for k in club_targets.keys() if not k.startswith("_")]
     
+    # Resolve the club's ranges once for all metrics
+    ranges = _resolve_club(club_type)
+    empty = {"score": None, "flag": None, "range": None}
+    
     for name in metric_names:
         value = metrics.get(name)
         if value is not None:
-            result[name] = normalize_metric(value, name, club_type)
+            entry = ranges.get(name)
+            result[name] = _normalize_value(value, entry) if entry is not None else dict(empty)
     
     return result
 
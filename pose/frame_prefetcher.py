@@ -0,0 +1,78 @@
+# pose/frame_prefetcher.py
+"""
+Background frame decoding for the pose extractors.
+
+OpenCV releases the GIL while decoding, so reading frames on a separate
+thread overlaps video decode with model inference on the consumer side.
+A bounded queue keeps at most a few decoded frames in memory.
+"""
+
+from __future__ import annotations
+
+import queue
+import threading
+from typing import Iterator, Optional, Tuple
+
+import numpy as np
+
+_END = object()
+
+
+def prefetch_frames(
+    cap,
+    frame_step: int = 1,
+    max_frames: Optional[int] = None,
+    maxsize: int = 8,
+) -> Iterator[Tuple[int, np.ndarray]]:
+    """
+    Yield (frame_index, frame) from an opened cv2.VideoCapture, decoded ahead
+    on a background thread.
+
+    Only every `frame_step`-th frame is retrieved; skipped frames are advanced
+    with grab() (no colour conversion / copy). Frame indices count every frame
+    in the video, as with a plain read() loop. The caller still owns `cap` and
+    must only release it after this generator is exhausted or closed.
+    """
+    frames: "queue.Queue" = queue.Queue(maxsize=maxsize)
+    stop = threading.Event()
+
+    def put(item) -> bool:
+        # Block while the consumer is behind, but give up once it has gone away
+        while not stop.is_set():
+            try:
+                frames.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def reader():
+        try:
+            frame_index = 0
+            while max_frames is None or frame_index < max_frames:
+                if frame_index % frame_step:
+                    if not cap.grab():
+                        break
+                else:
+                    ok, frame = cap.read()
+                    if not ok or not put((frame_index, frame)):
+                        break
+                frame_index += 1
+        except Exception as e:  # surfaced on the consumer thread
+            put(e)
+        finally:
+            put(_END)
+
+    thread = threading.Thread(target=reader, name="frame-prefetch", daemon=True)
+    thread.start()
+    try:
+        while True:
+            item = frames.get()
+            if item is _END:
+                break
+            if isinstance(item, Exception):
+                raise item
+            yield item
+    finally:
+        stop.set()
+        thread.join()
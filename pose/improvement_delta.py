@@ -119,23 +119,65 @@ def compute_improvement_delta(
     if metric_names is None:
         metric_names = KEY_METRICS
     
-    result = {}
+    # Only metrics present on the current swing are reported
+    names = [name for name in metric_names if current.get(name) is not None]
+    swings = [swing for swing in recent if isinstance(swing, dict)]
+    if not names:
+        return {}
+    
+    # (metrics, swings) matrix, newest swing first; NaN marks a missing value
+    values = np.array(
+        [[swing.get(name) for swing in swings] for name in names],
+        dtype=np.float64,
+    ).reshape(len(names), len(swings))
+    currents = np.array([current[name] for name in names], dtype=np.float64)
+    
+    valid = ~np.isnan(values)
+    counts = valid.sum(axis=1)
+    safe_counts = np.maximum(counts, 1)
+    masked = np.where(valid, values, 0.0)
+    
+    # Newest valid value per metric (unused where counts == 0)
+    lasts = values[np.arange(len(names)), valid.argmax(axis=1)] if swings else currents
+    means = masked.sum(axis=1) / safe_counts
+    stds = np.sqrt((np.where(valid, values - means[:, None], 0.0) ** 2).sum(axis=1) / safe_counts)
     
-    for name in metric_names:
-        current_value = current.get(name)
+    # Trend: newer half of the valid values vs the older half
+    mids = counts // 2
+    rank = np.cumsum(valid, axis=1) - 1
+    newer = valid & (rank < mids[:, None])
+    newer_means = np.where(newer, values, 0.0).sum(axis=1) / np.maximum(mids, 1)
+    older_means = np.where(valid & ~newer, values, 0.0).sum(axis=1) / np.maximum(counts - mids, 1)
+    trend_diffs = newer_means - older_means
+    
+    result = {}
+    for i, name in enumerate(names):
+        delta = {
+            "delta_vs_last": None,
+            "delta_vs_mean": None,
+            "consistency_std": None,
+            "trend": None,  # "improving", "declining", "stable"
+        }
         
-        # Collect recent values for this metric
-        recent_values = []
-        for swing in recent:
-            if isinstance(swing, dict):
-                val = swing.get(name)
-                recent_values.append(val)
+        if counts[i]:
+            delta["delta_vs_last"] = round(float(currents[i] - lasts[i]), 3)
+            delta["delta_vs_mean"] = round(float(currents[i] - means[i]), 3)
         
-        delta = compute_metric_delta(current_value, recent_values)
+        if counts[i] >= 2:
+            std = round(float(stds[i]), 3)
+            delta["consistency_std"] = std
+            
+            diff = float(trend_diffs[i])
+            threshold = std * 0.5 if std else 1.0
+            if abs(diff) < threshold:
+                delta["trend"] = "stable"
+            elif diff > 0:
+                delta["trend"] = "improving"  # Getting higher (may be good or bad)
+            else:
+                delta["trend"] = "declining"  # Getting lower
         
-        if current_value is not None:
-            delta["current"] = current_value
-            result[name] = delta
+        delta["current"] = current[name]
+        result[name] = delta
     
     return result
 
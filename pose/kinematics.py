@@ -1,31 +1,88 @@
 import numpy as np
 from typing import List, Tuple
 
+# Numba compiles the FK loop to straight-line 3x3 arithmetic; without it the
+# level-batched NumPy path below is used
+try:
+    from numba import njit
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+
 # SMPL kinematic tree (parent indices)
 # -1 means root
 SMPL_PARENTS = [
     -1, 0, 0, 0, 1, 2, 3, 4, 5, 6, 7, 8, 9, 9, 9, 12, 13, 14, 16, 17, 18, 19, 20, 21
 ]
+_PARENTS = np.array(SMPL_PARENTS, dtype=np.int64)
+
+def _tree_levels(parents: List[int]) -> List[Tuple[np.ndarray, np.ndarray]]:
+    """(joint indices, parent indices) per tree depth, root excluded.
+
+    Joints at the same depth only depend on shallower ones, so each level
+    is one batched matmul.
+    """
+    depth = [0] * len(parents)
+    for i in range(1, len(parents)):
+        depth[i] = depth[parents[i]] + 1
+    levels = []
+    for d in range(1, max(depth) + 1):
+        idx = np.array([i for i in range(len(parents)) if depth[i] == d])
+        levels.append((idx, _PARENTS[idx]))
+    return levels
+
+_LEVELS = _tree_levels(SMPL_PARENTS)
+
+def _global_rotations(rots: np.ndarray) -> np.ndarray:
+    """Compose relative (24, 3, 3) rotations down the tree, one level at a time."""
+    global_rots = np.empty((24, 3, 3))
+    global_rots[0] = rots[0]
+    for idx, parent in _LEVELS:
+        global_rots[idx] = global_rots[parent] @ rots[idx]
+    return global_rots
+
+if NUMBA_AVAILABLE:
+    @njit(cache=True, fastmath=True)
+    def _fk_kernel(rots, parents, offsets, root_pos):
+        """Joint positions; parents must precede children (true for SMPL)."""
+        global_rots = np.empty((24, 3, 3))
+        joints = np.empty((24, 3))
+        global_rots[0] = rots[0]
+        joints[0] = root_pos
+        for i in range(1, 24):
+            p = parents[i]
+            for a in range(3):
+                for b in range(3):
+                    s = 0.0
+                    for c in range(3):
+                        s += global_rots[p, a, c] * rots[i, c, b]
+                    global_rots[i, a, b] = s
+            for a in range(3):
+                s = 0.0
+                for c in range(3):
+                    s += global_rots[p, a, c] * offsets[i, c]
+                joints[i, a] = joints[p, a] + s
+        return joints
 
 def calculate_offsets_from_pose(
-    joints_3d: List[List[float]], 
-    rotations: List[List[List[float]]]
+    joints_3d: np.ndarray, 
+    rotations: np.ndarray
 ) -> np.ndarray:
     """
     Calculate bone offsets from a given pose (joints and rotations).
     This ensures we capture the subject's specific bone lengths.
     
     Args:
-        joints_3d: (24, 3) joint positions
-        rotations: (24, 3, 3) rotation matrices (global or local? HybrIK usually gives global relative to camera or root?)
+        joints_3d: (24, 3) float64 joint positions (nested lists are converted)
+        rotations: (24, 3, 3) float64 rotation matrices (global or local? HybrIK usually gives global relative to camera or root?)
                    Wait, HybrIK smpl_pose is usually relative rotations (pose parameters).
                    Let's assume standard SMPL relative rotations.
                    
     Returns:
         offsets: (24, 3) bone vectors relative to parent
     """
-    joints = np.array(joints_3d)
-    rots = np.array(rotations)
+    joints = np.asarray(joints_3d, dtype=np.float64)
+    rots = np.asarray(rotations, dtype=np.float64)
     offsets = np.zeros((24, 3))
     
     # We need Global Rotations to invert the relationship:
@@ -33,63 +90,65 @@ def calculate_offsets_from_pose(
     # => Offset_Child = inv(Global_Rot_Parent) @ (Global_Pos_Child - Global_Pos_Parent)
     
     # First, compute global rotations from relative ones
-    global_rots = np.zeros((24, 3, 3))
-    global_rots[0] = rots[0]
-    
-    for i in range(1, 24):
-        parent = SMPL_PARENTS[i]
-        global_rots[i] = global_rots[parent] @ rots[i]
+    global_rots = _global_rotations(rots)
         
-    # Now compute offsets
+    # Now compute offsets (all bones at once)
     # Root offset is just 0 (or root position, but we handle root pos separately)
-    offsets[0] = np.zeros(3) 
+    parents = _PARENTS[1:]
+    bone_vecs = joints[1:] - joints[parents]
     
-    for i in range(1, 24):
-        parent = SMPL_PARENTS[i]
-        bone_vec = joints[i] - joints[parent]
-        
-        # Inverse of rotation matrix is its transpose
-        inv_parent_rot = global_rots[parent].T
-        
-        offsets[i] = inv_parent_rot @ bone_vec
+    # Inverse of rotation matrix is its transpose
+    offsets[1:] = np.einsum('nji,nj->ni', global_rots[parents], bone_vecs)
         
     return offsets
 
 def forward_kinematics(
-    rotations: List[List[List[float]]],
-    root_position: List[float],
+    rotations: np.ndarray,
+    root_position: np.ndarray,
     offsets: np.ndarray
-) -> List[List[float]]:
+) -> np.ndarray:
     """
     Compute global joint positions from rotations and offsets.
     
+    Float64 arrays are used as-is (no copy); nested lists are accepted too.
+    Returns an ndarray rather than the nested lists of earlier versions; call
+    .tolist() on the result where the list form is needed.
+    
     Args:
-        rotations: (24, 3, 3) relative rotation matrices
+        rotations: (24, 3, 3) float64 relative rotation matrices
         root_position: (3,) global position of the root joint
         offsets: (24, 3) bone offsets
         
     Returns:
-        joints: (24, 3) global joint positions
+        joints: (24, 3) float64 global joint positions
     """
-    rots = np.array(rotations)
-    root_pos = np.array(root_position)
+    rots = np.asarray(rotations, dtype=np.float64)
+    root_pos = np.asarray(root_position, dtype=np.float64)
+    
+    if NUMBA_AVAILABLE:
+        return _fk_kernel(
+            np.ascontiguousarray(rots),
+            _PARENTS,
+            np.ascontiguousarray(offsets, dtype=np.float64),
+            root_pos,
+        )
     
     joints = np.zeros((24, 3))
-    global_rots = np.zeros((24, 3, 3))
+    global_rots = np.empty((24, 3, 3))
     
     # Root
     joints[0] = root_pos
     global_rots[0] = rots[0]
     
-    # Propagate
-    for i in range(1, 24):
-        parent = SMPL_PARENTS[i]
+    # Propagate one tree level at a time
+    for idx, parent in _LEVELS:
+        parent_rots = global_rots[parent]
         
         # Global rotation
-        global_rots[i] = global_rots[parent] @ rots[i]
+        global_rots[idx] = parent_rots @ rots[idx]
         
         # Global position
         # Pos_i = Pos_parent + Rot_parent @ Offset_i
-        joints[i] = joints[parent] + global_rots[parent] @ offsets[i]
+        joints[idx] = joints[parent] + np.einsum('nij,nj->ni', parent_rots, offsets[idx])
         
-    return joints.tolist()
+    return joints
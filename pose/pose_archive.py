@@ -0,0 +1,106 @@
+# pose/pose_archive.py
+"""
+Compact on-disk format for a session's pose frames (`{session_id}_poses.npz`).
+
+Landmark coordinates are normalized image units, stored as int16 fixed point
+(1e-4 resolution, range +/-3.27); visibility is stored as uint8 (1/255 steps).
+That is well below pose-estimator noise, and the file is several times smaller
+than the equivalent `_poses.json` and loads without a JSON parse. A session
+with coordinates outside the int16 range is stored as float32 instead of being
+clipped.
+"""
+
+from __future__ import annotations
+
+import os
+from typing import Any, Dict, List, Sequence
+
+import numpy as np
+
+from pose.types import FramePose
+
+POSE_COORD_SCALE = 10000
+VISIBILITY_SCALE = 255
+_INT16 = np.iinfo(np.int16)
+_COORD_LIMIT = _INT16.max / POSE_COORD_SCALE
+
+
+def save_poses_npz(file, poses: Sequence[FramePose]) -> None:
+    """Write poses (path or binary file object) as a compressed, quantized archive.
+
+    A path is written to `<name>.tmp` and renamed into place, so readers never
+    see a partial archive.
+    """
+    n_landmarks = len(poses[0].landmarks) if poses else 0
+    # Point3D is a tuple, so this is one (frames, landmarks, 4) conversion
+    lm = np.nan_to_num(np.array([p.landmarks for p in poses], dtype=np.float64).reshape(len(poses), n_landmarks, 4))
+
+    coords = lm[..., :3]
+    if coords.size and np.abs(coords).max() > _COORD_LIMIT:
+        xyz = coords.astype(np.float32)
+    else:
+        xyz = np.rint(coords * POSE_COORD_SCALE).astype(np.int16)
+    visibility = np.rint(np.clip(lm[..., 3], 0.0, 1.0) * VISIBILITY_SCALE).astype(np.uint8)
+
+    arrays = {
+        "frame_index": np.array([p.frame_index for p in poses], dtype=np.int32),
+        "timestamp_ms": np.array([p.timestamp_ms for p in poses], dtype=np.float64),
+        "xyz": xyz,
+        "visibility": visibility,
+    }
+    smpl_mask = np.array([p.smpl_pose is not None for p in poses], dtype=bool)
+    if smpl_mask.any():
+        # Frames without an SMPL fit are NaN rows, flagged by smpl_mask
+        present = np.asarray([p.smpl_pose for p in poses if p.smpl_pose is not None], dtype=np.float32)
+        smpl_pose = np.full((len(poses),) + present.shape[1:], np.nan, dtype=np.float32)
+        smpl_pose[smpl_mask] = present
+        arrays["smpl_pose"] = smpl_pose
+        arrays["smpl_mask"] = smpl_mask
+
+    if isinstance(file, (str, os.PathLike)):
+        # Through a file object: savez would append ".npz" to the temp name
+        tmp_path = f"{os.fspath(file)}.tmp"
+        try:
+            with open(tmp_path, "wb") as f:
+                np.savez_compressed(f, **arrays)
+            os.replace(tmp_path, file)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+    else:
+        np.savez_compressed(file, **arrays)
+
+
+def load_pose_dicts(file) -> List[Dict[str, Any]]:
+    """Read an archive back into the `_poses.json` frame layout.
+
+    Returns dicts with frame_index, timestamp_ms, landmarks ({x, y, z,
+    visibility}) and smpl_pose (None for frames without one), so callers can
+    treat both formats alike.
+    """
+    with np.load(file) as data:
+        xyz = data["xyz"]
+        xyz = (xyz / POSE_COORD_SCALE if xyz.dtype == np.int16 else xyz.astype(np.float64)).tolist()
+        visibility = (data["visibility"] / VISIBILITY_SCALE).tolist()
+        frame_index = data["frame_index"].tolist()
+        timestamp_ms = data["timestamp_ms"].tolist()
+        if "smpl_pose" in data.files:
+            smpl_pose = data["smpl_pose"].tolist()
+            # Archives from before smpl_mask only stored smpl_pose when every frame had one
+            smpl_mask = data["smpl_mask"].tolist() if "smpl_mask" in data.files else [True] * len(smpl_pose)
+        else:
+            smpl_pose = smpl_mask = None
+
+    return [
+        {
+            "frame_index": frame_index[i],
+            "timestamp_ms": timestamp_ms[i],
+            "landmarks": [
+                {"x": x, "y": y, "z": z, "visibility": v}
+                for (x, y, z), v in zip(xyz[i], visibility[i])
+            ],
+            "smpl_pose": smpl_pose[i] if smpl_pose is not None and smpl_mask[i] else None,
+        }
+        for i in range(len(frame_index))
+    ]
@@ -308,8 +308,8 @@ def enforce_swing_plane(
         
         # Recompute FK
         # Use original offsets
-        offsets = calculate_offsets_from_pose(joints.tolist(), smpl_pose.tolist())
-        new_joints_fk = forward_kinematics(new_smpl_pose.tolist(), joints[0].tolist(), offsets)
-        corrected_joints_frames.append(new_joints_fk)
+        offsets = calculate_offsets_from_pose(joints, smpl_pose)
+        new_joints_fk = forward_kinematics(new_smpl_pose, joints[0], offsets)
+        corrected_joints_frames.append(new_joints_fk.tolist())
         
     return corrected_joints_frames, corrected_smpl_frames
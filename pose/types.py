@@ -1,4 +1,5 @@
-from typing import List, Optional, NamedTuple
+from operator import itemgetter
+from typing import Iterable, List, Optional, NamedTuple
 
 class Point3D(NamedTuple):
     x: float
@@ -6,6 +7,16 @@ class Point3D(NamedTuple):
     z: float
     visibility: float
 
+_LANDMARK_FIELDS = itemgetter("x", "y", "z", "visibility")
+
+def landmarks_from_dicts(landmarks: Iterable[dict]) -> List[Point3D]:
+    """Point3D list from extractor landmark dicts (keys x, y, z, visibility).
+
+    Builds the tuples directly, skipping NamedTuple keyword-argument handling;
+    this runs once per landmark per frame.
+    """
+    return [tuple.__new__(Point3D, _LANDMARK_FIELDS(lm)) for lm in landmarks]
+
 class FramePose(NamedTuple):
     frame_index: int
     timestamp_ms: float
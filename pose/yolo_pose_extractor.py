@@ -21,6 +21,8 @@ import logging
 import cv2
 import numpy as np
 
+from pose.frame_prefetcher import prefetch_frames
+
 logger = logging.getLogger(__name__)
 
 # YOLOv8 imports (optional)
@@ -99,26 +101,26 @@ def _coco_to_mediapipe_landmarks(keypoints: np.ndarray, img_width: int, img_heig
     Returns:
         List of 33 landmarks in MediaPipe format (normalized coordinates)
     """
+    # Normalize all keypoints in one array op (in the keypoints' own dtype, as the
+    # per-element division did) and convert to Python floats once, instead of
+    # indexing NumPy scalars per keypoint
+    keypoints = np.asarray(keypoints)
+    xy = (keypoints[:, :2] / np.array((img_width, img_height), dtype=keypoints.dtype)).tolist()
+    conf = keypoints[:, 2].tolist()
+    n_keypoints = len(conf)
+
     # Initialize 33 landmarks with zeros
-    landmarks = []
-    for i in range(33):
-        landmarks.append({
-            "x": 0.0,
-            "y": 0.0,
-            "z": 0.0,
-            "visibility": 0.0,
-        })
+    landmarks = [{"x": 0.0, "y": 0.0, "z": 0.0, "visibility": 0.0} for _ in range(33)]
     
     # Map COCO keypoints to MediaPipe positions
     for coco_idx, mp_idx in COCO_TO_MEDIAPIPE.items():
-        if coco_idx < len(keypoints):
-            x_px, y_px, conf = keypoints[coco_idx]
-            
+        if coco_idx < n_keypoints:
+            x, y = xy[coco_idx]
             landmarks[mp_idx] = {
-                "x": float(x_px / img_width),
-                "y": float(y_px / img_height),
+                "x": x,
+                "y": y,
                 "z": 0.0,  # YOLOv8-pose is 2D
-                "visibility": float(conf),
+                "visibility": conf[coco_idx],
             }
     
     # Interpolate missing MediaPipe landmarks from available ones
@@ -138,7 +140,44 @@ def _coco_to_mediapipe_landmarks(keypoints: np.ndarray, img_width: int, img_heig
     return landmarks
 
 
-def extract_pose_frames_yolo(video_path: Path, max_frames: int | None = None, frame_step: int = 1) -> List[PoseFrame]:
+def _results_to_pose_frame(results, frame_index: int, fps: float, width: int, height: int) -> Optional[PoseFrame]:
+    """Best person's keypoints from one YOLO Results as a PoseFrame, or None if nobody was detected."""
+    if results.keypoints is None or len(results.keypoints) == 0:
+        return None
+
+    # Get keypoints for first detected person
+    # Shape: (num_detections, 17, 3) where 3 = x, y, conf
+    keypoints_all = results.keypoints.data.cpu().numpy()
+    if len(keypoints_all) == 0:
+        return None
+
+    # Take the first (or highest confidence) person
+    # If multiple people, pick the one with highest average keypoint confidence
+    if len(keypoints_all) > 1:
+        avg_confs = keypoints_all[:, :, 2].mean(axis=1)
+        best_idx = avg_confs.argmax()
+        keypoints = keypoints_all[best_idx]
+    else:
+        keypoints = keypoints_all[0]
+
+    # Convert to MediaPipe format
+    landmarks = _coco_to_mediapipe_landmarks(keypoints, width, height)
+
+    return {
+        "frame_index": frame_index,
+        "timestamp_sec": frame_index / fps,
+        "landmarks": landmarks,
+        "yolo_keypoints": keypoints.tolist(),  # Store original too
+    }
+
+
+def extract_pose_frames_yolo(
+    video_path: Path,
+    max_frames: int | None = None,
+    frame_step: int = 1,
+    batch_size: int = 8,
+    cap: "cv2.VideoCapture | None" = None,
+) -> List[PoseFrame]:
     """
     Extract pose landmarks using YOLOv8-pose.
     
@@ -148,6 +187,9 @@ def extract_pose_frames_yolo(video_path: Path, max_frames: int | None = None, fr
         video_path: Path to video file
         max_frames: Optional limit on frames to process
         frame_step: Process every Nth frame (1=all, 2=every other, etc.)
+        batch_size: Frames per YOLO forward pass
+        cap: Optional already-opened capture of video_path, positioned at the
+            first frame; it is read to the end but left open for the caller
     
     Returns:
         List of PoseFrame dicts with 'frame_index', 'timestamp_sec', 'landmarks'
@@ -156,7 +198,9 @@ def extract_pose_frames_yolo(video_path: Path, max_frames: int | None = None, fr
     if model is None:
         raise RuntimeError("YOLOv8-pose not available. Install with: pip install ultralytics")
     
-    cap = cv2.VideoCapture(str(video_path))
+    owns_cap = cap is None
+    if owns_cap:
+        cap = cv2.VideoCapture(str(video_path))
     if not cap.isOpened():
         raise RuntimeError(f"Could not open video: {video_path}")
     
@@ -168,59 +212,49 @@ def extract_pose_frames_yolo(video_path: Path, max_frames: int | None = None, fr
         fps = 30.0
     
     frames: List[PoseFrame] = []
-    frame_index = 0
+    # Decode runs ahead on a background thread while YOLO infers on the
+    # current batch; skipped frames (frame_step) are only grabbed
+    frame_iter = prefetch_frames(cap, frame_step=frame_step, max_frames=max_frames,
+                                 maxsize=max(8, 2 * batch_size))
+    batch_indices: List[int] = []
+    batch_frames: List[np.ndarray] = []
+    processed = 0
+
+    def run_batch():
+        # One forward pass for the whole batch (Ultralytics accepts a list of images)
+        try:
+            results_list = model(batch_frames, verbose=False)
+        except Exception as e:
+            # e.g. out of memory on a large batch: fall back to one frame per pass
+            logger.warning(f"YOLOv8 batch inference failed on frames {batch_indices[0]}-{batch_indices[-1]}: {e}")
+            results_list = None
+        for i, frame_index in enumerate(batch_indices):
+            try:
+                results = results_list[i] if results_list is not None else model(batch_frames[i], verbose=False)[0]
+                pose_frame = _results_to_pose_frame(results, frame_index, fps, width, height)
+            except Exception as e:
+                logger.warning(f"YOLOv8 inference failed on frame {frame_index}: {e}")
+                continue
+            if pose_frame is not None:
+                frames.append(pose_frame)
     
     try:
-        while True:
-            ok, frame = cap.read()
-            if not ok:
-                break
-            
-            if max_frames is not None and frame_index >= max_frames:
-                break
-            
-            # Only process every Nth frame
-            if frame_index % frame_step == 0:
-                try:
-                    # Run YOLO pose estimation (returns Results object)
-                    results = model(frame, verbose=False)[0]
-                    
-                    if results.keypoints is not None and len(results.keypoints) > 0:
-                        # Get keypoints for first detected person
-                        # Shape: (num_detections, 17, 3) where 3 = x, y, conf
-                        keypoints_all = results.keypoints.data.cpu().numpy()
-                        
-                        if len(keypoints_all) > 0:
-                            # Take the first (or highest confidence) person
-                            # If multiple people, pick the one with highest average keypoint confidence
-                            if len(keypoints_all) > 1:
-                                avg_confs = keypoints_all[:, :, 2].mean(axis=1)
-                                best_idx = avg_confs.argmax()
-                                keypoints = keypoints_all[best_idx]
-                            else:
-                                keypoints = keypoints_all[0]
-                            
-                            # Convert to MediaPipe format
-                            landmarks = _coco_to_mediapipe_landmarks(keypoints, width, height)
-                            
-                            timestamp_sec = frame_index / fps
-                            frames.append({
-                                "frame_index": frame_index,
-                                "timestamp_sec": timestamp_sec,
-                                "landmarks": landmarks,
-                                "yolo_keypoints": keypoints.tolist(),  # Store original too
-                            })
-                            
-                except Exception as e:
-                    logger.warning(f"YOLOv8 inference failed on frame {frame_index}: {e}")
-            
-            frame_index += 1
-            
-            if frame_index % 20 == 0:
-                logger.info(f"YOLOv8-pose: Processed {frame_index} frames...")
+        for frame_index, frame in frame_iter:
+            batch_indices.append(frame_index)
+            batch_frames.append(frame)
+            if len(batch_frames) >= batch_size:
+                run_batch()
+                processed += len(batch_frames)
+                batch_indices.clear()
+                batch_frames.clear()
+                logger.info(f"YOLOv8-pose: Processed {processed} frames...")
+        if batch_frames:
+            run_batch()
                 
     finally:
-        cap.release()
+        frame_iter.close()
+        if owns_cap:
+            cap.release()
     
     if not frames:
         raise RuntimeError("No pose frames extracted with YOLOv8-pose")
@@ -1,3 +1,4 @@
+from functools import lru_cache
 from typing import Dict, NamedTuple, Optional
 
 class MetricTarget(NamedTuple):
@@ -142,6 +143,8 @@ def get_default_profile() -> ReferenceProfile:
     # Default to DTL as it's safer/more common for casual users
     return ReferenceProfile("Default Pro (DTL)", "dtl", "driver", get_dtl_targets())
 
+# Profiles are read-only after construction, so callers can share one instance
+@lru_cache(maxsize=None)
 def get_reference_profile_for(club_type: str, view: str, skill_level: str = "pro") -> ReferenceProfile:
     view = view.lower() if view else "dtl"
     
@@ -1,15 +1,25 @@
-import numpy as np
-from scipy.spatial.transform import Rotation as R
+import math
 
-matrix = np.array([
+matrix = [
   [-0.12681294977664948, -0.03936590254306793, 0.9911454319953918], 
   [-0.15554757416248322, -0.9860610961914062, -0.05906570702791214], 
   [0.9796549081802368, -0.16166073083877563, 0.11892211437225342]
-])
+]
 
-r = R.from_matrix(matrix)
-euler = r.as_euler('xyz', degrees=True)
-print(f"Euler XYZ: {euler}")
+def euler_xyz_deg(m):
+    """Extrinsic XYZ Euler angles (degrees) of a 3x3 rotation matrix, i.e. scipy's
+    Rotation.from_matrix(m).as_euler('xyz', degrees=True) without the scipy import."""
+    sy = math.hypot(m[0][0], m[1][0])
+    x = math.atan2(m[2][1], m[2][2])
+    y = math.atan2(-m[2][0], sy)
+    z = math.atan2(m[1][0], m[0][0])
+    return [math.degrees(x), math.degrees(y), math.degrees(z)]
+
+def fmt(values):
+    return "[" + " ".join(f"{v:.8f}" for v in values) + "]"
+
+euler = euler_xyz_deg(matrix)
+print(f"Euler XYZ: {fmt(euler)}")
 
 # Try to find a correction
 # Goal: Y axis (col 1) should be pointing UP (0, 1, 0)
@@ -21,10 +31,11 @@ print(f"Euler XYZ: {euler}")
 # Col 1 of M_new = R_x_180 @ Col 1_old = [1,0,0; 0,-1,0; 0,0,-1] @ [-0.04, -0.98, -0.16] = [-0.04, 0.98, 0.16] -> UP!
 
 print("Applying 180 deg rotation around X (Global):")
-rx_180 = R.from_euler('x', 180, degrees=True).as_matrix()
-m_new = rx_180 @ matrix
-print(m_new)
-print(f"New Euler: {R.from_matrix(m_new).as_euler('xyz', degrees=True)}")
+# R_x_180 @ M just negates rows 1 and 2
+m_new = [matrix[0], [-v for v in matrix[1]], [-v for v in matrix[2]]]
+for row in m_new:
+    print(fmt(row))
+print(f"New Euler: {fmt(euler_xyz_deg(m_new))}")
 
 # Check other axes
 # Col 0 (Right) was [-0.12, -0.15, 0.98] -> Z
@@ -8,7 +8,8 @@ def check_user(email):
         print(f"Database {DB_PATH} not found!")
         return
     
-    conn = sqlite3.connect(DB_PATH)
+    # Read-only: never takes a write lock against the running app
+    conn = sqlite3.connect(f"file:{DB_PATH}?mode=ro", uri=True, timeout=5)
     cursor = conn.cursor()
     
     try:
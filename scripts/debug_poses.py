@@ -4,29 +4,52 @@ from scipy.spatial.transform import Rotation as R
 import sys
 import os
 
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from pose.pose_archive import load_pose_dicts
+
+# ijson streams the frame array so only frames up to the first SMPL pose are
+# parsed; stdlib json (whole file in memory) otherwise
+try:
+    import ijson
+except ImportError:
+    ijson = None
+
+def iter_frames(f):
+    if ijson is not None:
+        return ijson.items(f, 'item', use_float=True)
+    return iter(json.load(f))
+
 def analyze_pose(session_id):
+    # Current sessions store a .npz archive; older ones a JSON dump
+    npz_path = f"c:/Projekt/GolfAnalyzer/videos/{session_id}_poses.npz"
     file_path = f"c:/Projekt/GolfAnalyzer/videos/{session_id}_poses.json"
     
+    if os.path.exists(npz_path):
+        analyze_first_smpl_frame(load_pose_dicts(npz_path))
+        return
+
     if not os.path.exists(file_path):
-        print(f"File not found: {file_path}")
+        print(f"File not found: {npz_path} or {file_path}")
         return
 
-    with open(file_path, 'r') as f:
-        data = json.load(f)
+    with open(file_path, 'rb') as f:
+        # Analyze the first valid frame
+        analyze_first_smpl_frame(iter_frames(f))
 
-    print(f"Loaded {len(data)} frames.")
-    
-    # Analyze the first valid frame
-    for i, frame in enumerate(data):
+def analyze_first_smpl_frame(frames):
+    for i, frame in enumerate(frames):
         if 'smpl_pose' in frame and frame['smpl_pose']:
             print(f"\nAnalyzing Frame {i}:")
             smpl_pose = np.array(frame['smpl_pose'])
             print(f"SMPL Pose Shape: {smpl_pose.shape}")
             
+            # Euler angles for all joints in one call: (24, 3)
+            eulers = R.from_matrix(smpl_pose.reshape(-1, 3, 3)).as_euler('xyz', degrees=True)
+            
             # Root Rotation (Index 0)
             root_mat = smpl_pose[0]
-            r = R.from_matrix(root_mat)
-            euler = r.as_euler('xyz', degrees=True)
+            euler = eulers[0]
             print(f"Root Rotation (Euler XYZ): {euler}")
             print(f"Root Matrix:\n{root_mat}")
             
@@ -40,9 +63,7 @@ def analyze_pose(session_id):
             # 13: "mixamorigLeftShoulder"
             
             l_shoulder_idx = 13
-            l_shoulder_mat = smpl_pose[l_shoulder_idx]
-            r_ls = R.from_matrix(l_shoulder_mat)
-            euler_ls = r_ls.as_euler('xyz', degrees=True)
+            euler_ls = eulers[l_shoulder_idx]
             print(f"L Shoulder (idx 13) Rotation (Euler XYZ): {euler_ls}")
             
             break
@@ -19,17 +19,20 @@ def fix_schema():
         existing_columns = [col[1] for col in cursor.fetchall()]
         print(f"Existing columns: {existing_columns}")
         
+        # One explicit transaction for all columns (one commit/fsync instead of
+        # one per column; sqlite3 does not open a transaction for DDL itself)
+        cursor.execute("BEGIN")
         for metric in new_metrics:
             if metric not in existing_columns:
                 print(f"Adding {metric}...")
                 try:
                     cursor.execute(f"ALTER TABLE swing_metrics ADD COLUMN {metric} FLOAT")
-                    conn.commit()
                     print(f"✓ Added {metric}")
                 except Exception as e:
                     print(f"Error adding {metric}: {e}")
             else:
                 print(f"✓ {metric} already exists")
+        conn.commit()
                 
     except Exception as e:
         print(f"Critical error: {e}")
@@ -2,6 +2,12 @@ import json
 import math
 from pathlib import Path
 
+# orjson serializes in C and writes bytes directly; stdlib json otherwise
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
 # --- 1. SMPL joint order (your backend names) --------------------
 SMPL_JOINT_ORDER = [
     "pelvis",      # 0
@@ -32,22 +38,11 @@ SMPL_JOINT_ORDER = [
 
 
 # --- 2. Basic math helpers ---------------------------------------
-def matmul(a, b):
-    """3x3 * 3x3 matrix multiply."""
-    return [
-        [
-            sum(a[i][k] * b[k][j] for k in range(3))
-            for j in range(3)
-        ]
-        for i in range(3)
-    ]
-
-
 def euler_xyz_to_mat3(rx_deg: float, ry_deg: float, rz_deg: float):
     """
     Build a 3x3 rotation matrix from XYZ Euler angles (degrees),
     matching the 'XYZ' convention you use in Three/Blender.
-    Order: R = Rz * Ry * Rx.
+    Order: R = Rz * Ry * Rx, written out in closed form.
     """
     rx = math.radians(rx_deg)
     ry = math.radians(ry_deg)
@@ -57,33 +52,20 @@ def euler_xyz_to_mat3(rx_deg: float, ry_deg: float, rz_deg: float):
     cy, sy = math.cos(ry), math.sin(ry)
     cz, sz = math.cos(rz), math.sin(rz)
 
-    Rx = [
-        [1, 0, 0],
-        [0, cx, -sx],
-        [0, sx, cx],
-    ]
-    Ry = [
-        [cy, 0, sy],
-        [0, 1, 0],
-        [-sy, 0, cy],
-    ]
-    Rz = [
-        [cz, -sz, 0],
-        [sz, cz, 0],
-        [0, 0, 1],
+    R = [
+        [cy * cz, sx * sy * cz - cx * sz, cx * sy * cz + sx * sz],
+        [cy * sz, sx * sy * sz + cx * cz, cx * sy * sz - sx * cz],
+        [-sy, sx * cy, cx * cy],
     ]
+    # nice rounding for JSON (+ 0.0 turns -0.0 into 0.0)
+    return [[round(v, 8) + 0.0 for v in row] for row in R]
 
-    R = matmul(Rz, matmul(Ry, Rx))
-    # nice rounding for JSON
-    return [[round(v, 8) for v in row] for row in R]
 
-
-def ident():
-    return [
-        [1.0, 0.0, 0.0],
-        [0.0, 1.0, 0.0],
-        [0.0, 0.0, 1.0],
-    ]
+IDENT = [
+    [1.0, 0.0, 0.0],
+    [0.0, 1.0, 0.0],
+    [0.0, 0.0, 1.0],
+]
 
 
 # --- 3. Define an "address" pose in degrees -----------------------
@@ -123,16 +105,13 @@ ANGLE_CONFIG = {
 }
 
 
+# The angles are fixed, so each joint's matrix is built once at import
+ADDRESS_MATS = {name: euler_xyz_to_mat3(*angles) for name, angles in ANGLE_CONFIG.items()}
+
+
 def build_address_pose():
-    mats = []
-    for name in SMPL_JOINT_ORDER:
-        if name in ANGLE_CONFIG:
-            rx, ry, rz = ANGLE_CONFIG[name]
-            m = euler_xyz_to_mat3(rx, ry, rz)
-        else:
-            m = ident()
-        mats.append(m)
-    return mats
+    # Shared matrices: treat the result as read-only
+    return [ADDRESS_MATS.get(name, IDENT) for name in SMPL_JOINT_ORDER]
 
 
 # --- 4. Write JSON file ------------------------------------------
@@ -140,7 +119,10 @@ def main(outfile: str = "address_pose.json"):
     pose_mats = build_address_pose()
     data = {"smpl_pose": pose_mats}
 
-    Path(outfile).write_text(json.dumps(data, indent=2))
+    if orjson is not None:
+        Path(outfile).write_bytes(orjson.dumps(data, option=orjson.OPT_INDENT_2))
+    else:
+        Path(outfile).write_text(json.dumps(data, indent=2))
     print(f"Wrote {outfile} with {len(pose_mats)} joints.")
 
 
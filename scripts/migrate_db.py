@@ -1,7 +1,7 @@
 """
 Migration script to update database schema
 """
-from app.core.database import Base, engine
+from app.core.database import Base, engine, ensure_indexes
 from app.models.user import User
 from app.models.db import SwingSession, SwingMetric, SwingPhase, SwingFeedbackDB, ReferenceProfileDB
 from app.models.drill import Drill
@@ -74,13 +74,18 @@ def migrate():
                 print(f"✓ Added {metric} column")
             else:
                 print(f"✓ {metric} column already exists")
-            
+
     except Exception as e:
         print(f"Note: {e}")
         conn.rollback()
     finally:
         conn.close()
     
+    # Indexes added to existing tables (the app also does this at startup),
+    # including the unique swing_feedback.session_id index used by the upsert
+    ensure_indexes(engine)
+    print("✓ Indexes present")
+    
     print("\n✅ Migration complete!")
     print("\nNext steps:")
     print("1. Run: python create_admin.py")
@@ -3,81 +3,122 @@ import os
 import sys
 import json
 import sqlite3
-from typing import List, Dict, Any
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
 
 # Ensure we can import app modules
 sys.path.append(os.getcwd())
 
-from pose.metrics import MetricsCalculator, _get_xyz_from_frame, IDX_L_WRIST, IDX_R_WRIST, IDX_L_SHOULDER, IDX_R_SHOULDER
-from app.models.db import SwingSession, SwingMetric
-from app.schemas import SwingPhases, SwingMetrics
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
+from pose.metrics import MetricsCalculator
+from pose.pose_archive import load_pose_dicts
+
+# orjson parses large pose files several times faster; stdlib json otherwise
+try:
+    import orjson
+    _json_loads = orjson.loads
+except ImportError:
+    _json_loads = json.loads
 
 DB_PATH = "golf_analyzer.db"
+VIDEOS_DIR = Path("videos")
 
-def get_latest_session_id():
-    # Find the most recently modified poses.json file
-    poses_files = [f for f in os.listdir("videos") if f.endswith("_poses.json")]
-    if not poses_files:
-        return None
-    
-    latest_file = max(poses_files, key=lambda f: os.path.getmtime(os.path.join("videos", f)))
-    # Filename is {uuid}_poses.json
-    return latest_file.replace("_poses.json", "")
+def get_pose_files() -> Dict[str, Path]:
+    # Filename is {uuid}_poses.npz, or {uuid}_poses.json for older sessions
+    files = {p.name[:-len("_poses.json")]: p for p in VIDEOS_DIR.glob("*_poses.json")}
+    files.update((p.name[:-len("_poses.npz")], p) for p in VIDEOS_DIR.glob("*_poses.npz"))
+    return files
 
-def backfill():
-    session_id = get_latest_session_id()
-    if not session_id:
-        print("No sessions found.")
-        return
+def load_db_phases(cursor, session_ids: List[str]) -> Dict[str, Tuple[int, int]]:
+    """(top_frame, impact_frame) per session, for pose files that don't embed phases."""
+    phases = {}
+    # Stay under SQLite's bound-parameter limit
+    for i in range(0, len(session_ids), 500):
+        chunk = session_ids[i:i + 500]
+        cursor.execute(
+            f"SELECT session_id, top_frame, impact_frame FROM swing_phases "
+            f"WHERE session_id IN ({','.join('?' * len(chunk))})",
+            chunk,
+        )
+        for session_id, top_frame, impact_frame in cursor.fetchall():
+            phases[session_id] = (top_frame, impact_frame)
+    return phases
+
+def compute_session_swing_path(job: Tuple[str, str, Optional[Tuple[int, int]]]) -> Tuple[str, Optional[float], Optional[str]]:
+    """Pure CPU work for one session (runs in a worker process).
+
+    Returns (session_id, swing_path_index, skip_reason).
+    """
+    session_id, pose_file, db_phases = job
+    if pose_file.endswith(".npz"):
+        pose_data = load_pose_dicts(pose_file)
+    else:
+        with open(pose_file, "rb") as f:
+            pose_data = _json_loads(f.read())
+
+    # {"frames": [...], "phases": {...}} or the plain frame list written by the worker
+    if isinstance(pose_data, dict):
+        frames = pose_data.get("frames", [])
+        phases_dict = pose_data.get("phases", {})
+        top_frame_idx = phases_dict.get("top_frame")
+        impact_frame_idx = phases_dict.get("impact_frame")
+    else:
+        frames = pose_data
+        top_frame_idx = impact_frame_idx = None
+
+    if (top_frame_idx is None or impact_frame_idx is None) and db_phases:
+        top_frame_idx, impact_frame_idx = db_phases
 
-    print(f"Backfilling Swing Path for Session: {session_id}")
-    
-    # Load Pose Data
-    pose_file = os.path.join("videos", f"{session_id}_poses.json")
-    if not os.path.exists(pose_file):
-        print(f"Pose file {pose_file} not found.")
-        return
-        
-    with open(pose_file, "r") as f:
-        pose_data = json.load(f)
-        
-    frames = pose_data.get("frames", [])
-    phases_dict = pose_data.get("phases", {})
-    
-    top_frame_idx = phases_dict.get("top_frame")
-    impact_frame_idx = phases_dict.get("impact_frame")
-    
     if top_frame_idx is None or impact_frame_idx is None:
-        print("Missing Top or Impact phase.")
-        return
+        return session_id, None, "Missing Top or Impact phase."
 
-    # Calculate Swing Path Index
-    calculator = MetricsCalculator()
-    
-    # Calculate using the internal method
-    swing_path_index = calculator._compute_swing_path_index(
+    swing_path_index = MetricsCalculator()._compute_swing_path_index(
         frames,
         top_frame_idx,
         impact_frame_idx,
         handedness="Right" # Assumed for now
     )
-    
-    print(f"Calculated Swing Path Index: {swing_path_index}")
-    
-    # Update Database
+    return session_id, swing_path_index, None
+
+def backfill():
+    pose_files = get_pose_files()
+    if not pose_files:
+        print("No sessions found.")
+        return
+
+    print(f"Backfilling Swing Path for {len(pose_files)} sessions...")
+
     conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
-    
-    cursor.execute(
-        "UPDATE swing_metrics SET swing_path_index = ? WHERE session_id = ?",
-        (swing_path_index, session_id)
-    )
-    conn.commit()
-    conn.close()
-    
-    print("Database updated successfully!")
+    try:
+        cursor = conn.cursor()
+        # Per-connection only: a failed backfill can simply be re-run
+        cursor.execute("PRAGMA synchronous=OFF")
+
+        db_phases = load_db_phases(cursor, list(pose_files))
+        jobs = [(sid, str(path), db_phases.get(sid)) for sid, path in pose_files.items()]
+
+        # Pose parsing + the index calculation are CPU-bound; spread over processes
+        updates = []
+        with ProcessPoolExecutor() as executor:
+            for session_id, swing_path_index, skip_reason in executor.map(
+                compute_session_swing_path, jobs, chunksize=16
+            ):
+                if skip_reason:
+                    print(f"  {session_id}: {skip_reason}")
+                    continue
+                print(f"  {session_id}: Swing Path Index = {swing_path_index}")
+                updates.append((swing_path_index, session_id))
+
+        # Update Database (one statement batch, one transaction)
+        cursor.executemany(
+            "UPDATE swing_metrics SET swing_path_index = ? WHERE session_id = ?",
+            updates
+        )
+        conn.commit()
+    finally:
+        conn.close()
+
+    print(f"Database updated successfully! ({len(updates)} sessions)")
 
 if __name__ == "__main__":
     backfill()
@@ -57,11 +57,16 @@ def migrate():
     
     conn = sqlite3.connect(DB_PATH)
     cursor = conn.cursor()
+    # Same journal settings as the app's engine (WAL persists in the file)
+    cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.execute("PRAGMA synchronous=NORMAL")
     
     # Get existing columns
     cursor.execute("PRAGMA table_info(swing_metrics)")
     existing_columns = {row[1] for row in cursor.fetchall()}
     
+    # sqlite3 autocommits DDL; an explicit transaction makes all ALTERs one commit
+    cursor.execute("BEGIN IMMEDIATE")
     for col_name, col_type in NEW_COLUMNS:
         if col_name not in existing_columns:
             print(f"Adding column: {col_name}")
@@ -2,7 +2,8 @@ import sqlite3
 
 def verify_schema():
     print("Verifying database schema...")
-    conn = sqlite3.connect('golf_analyzer.db')
+    # Read-only: never takes a write lock against the running app
+    conn = sqlite3.connect("file:golf_analyzer.db?mode=ro", uri=True, timeout=5)
     cursor = conn.cursor()
     
     try:
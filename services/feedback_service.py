@@ -1,10 +1,30 @@
 import os
 import json
-from typing import List, Dict, Any, Optional
+from functools import lru_cache
+from typing import Callable, List, Dict, Any, Optional
 from openai import OpenAI
 from app.schemas import SwingMetrics, SwingScores, SwingFeedback, MetricScore, DrillResponse
 from reference.reference_profiles import get_reference_profile_for, ReferenceProfile
 
+# Metric key substrings -> value formatter, checked in order (first match wins)
+_METRIC_FORMAT_RULES = (
+    (("duration", "ms"), lambda v: f"{v/1000:.2f}s"),
+    (("ratio", "tempo"), lambda v: f"{v:.2f}:1"),
+    (("deg", "angle"), lambda v: f"{v:.1f}°"),
+    (("range", "amount", "index"), lambda v: f"{v:.3f}"),
+)
+
+def _format_plain(value) -> str:
+    return f"{value:.1f}"
+
+@lru_cache(maxsize=256)
+def _metric_formatter(metric_key: str) -> Callable[[Any], str]:
+    """Resolve the unit formatter for a metric key once; keys are a small fixed set."""
+    for needles, formatter in _METRIC_FORMAT_RULES:
+        if any(needle in metric_key for needle in needles):
+            return formatter
+    return _format_plain
+
 class FeedbackService:
     def __init__(self):
         api_key = os.getenv("OPENAI_API_KEY")
@@ -16,19 +36,9 @@ class FeedbackService:
         # For now, we'll assume it's there or the client will raise an error.
         self.client = OpenAI(api_key=api_key) if api_key else None
 
-    def generate_feedback(
-        self, 
-        metrics: SwingMetrics, 
-        scores: SwingScores, 
-        handedness: str, 
-        club_type: str,
-        db: Optional[Any] = None, # Use Any to avoid circular imports at top level if needed, or import appropriately
-        reference_profile: Optional[ReferenceProfile] = None
-    ) -> SwingFeedback:
-        """
-        Generate AI-powered coaching feedback based on swing metrics.
-        """
-        # --- 1. Identify Priority Issues from Scores ---
+    @staticmethod
+    def _top_issues(scores: SwingScores) -> list:
+        """Up to three (metric_key, rating, weight) issues: red first, then by weight."""
         priority_metrics = []
         for metric_key, score_info in scores.metric_scores.items():
             if score_info.score in ["red", "yellow"]:
@@ -38,43 +48,75 @@ class FeedbackService:
         
         # Sort by severity (red first) then weight
         priority_metrics.sort(key=lambda x: (0 if x[1] == 'red' else 1, -x[2]))
-        top_issues = priority_metrics[:3]
+        return priority_metrics[:3]
+
+    def find_drills(self, scores: SwingScores, db) -> List[DrillResponse]:
+        """
+        Drills for the priority issues (deterministic DB lookup, at most 3).
+        Only this step needs the DB, so callers can run it in a short session
+        and pass the result to generate_feedback(drills=...).
+        """
+        from app.models.drill import Drill as DrillModel
         
-        # --- 2. Query DB for Drills (Deterministic) ---
+        top_issues = self._top_issues(scores)
         final_drills = []
-        if db:
-            from app.models.drill import Drill as DrillModel
+        
+        # Collect target metrics we need drills for
+        target_metrics = [issue[0] for issue in top_issues]
+        
+        if target_metrics:
+            # Find drills that target these metrics
+            found_drills = db.query(DrillModel).filter(DrillModel.target_metric.in_(target_metrics)).all()
             
-            # Collect target metrics we need drills for
-            target_metrics = [issue[0] for issue in top_issues]
+            # Convert to Schema format and prioritize
+            # We want to match them to the highest priority issues first
+            for issue_key, _, _ in top_issues:
+                # Find drills for this specific issue
+                matching = [d for d in found_drills if d.target_metric == issue_key]
+                for d in matching:
+                    # Avoid duplicates
+                    if not any(fd.id == d.id for fd in final_drills):
+                        final_drills.append(DrillResponse(
+                            id=d.id,
+                            title=d.title,
+                            description=d.description,
+                            category=d.category,
+                            difficulty=d.difficulty,
+                            video_url=d.video_url,
+                            target_metric=d.target_metric
+                        ))
+                        
+                if len(final_drills) >= 3:
+                    break
             
-            if target_metrics:
-                # Find drills that target these metrics
-                found_drills = db.query(DrillModel).filter(DrillModel.target_metric.in_(target_metrics)).all()
-                
-                # Convert to Schema format and prioritize
-                # We want to match them to the highest priority issues first
-                for issue_key, _, _ in top_issues:
-                    # Find drills for this specific issue
-                    matching = [d for d in found_drills if d.target_metric == issue_key]
-                    for d in matching:
-                        # Avoid duplicates
-                        if not any(fd.id == d.id for fd in final_drills):
-                            final_drills.append(DrillResponse(
-                                id=d.id,
-                                title=d.title,
-                                description=d.description,
-                                category=d.category,
-                                difficulty=d.difficulty,
-                                video_url=d.video_url,
-                                target_metric=d.target_metric
-                            ))
-                            
-                    if len(final_drills) >= 3:
-                        break
-                
-                # Trim to top 3
-                final_drills = final_drills[:3]
+            # Trim to top 3
+            final_drills = final_drills[:3]
+        
+        return final_drills
+
+    def generate_feedback(
+        self, 
+        metrics: SwingMetrics, 
+        scores: SwingScores, 
+        handedness: str, 
+        club_type: str,
+        db: Optional[Any] = None, # Use Any to avoid circular imports at top level if needed, or import appropriately
+        reference_profile: Optional[ReferenceProfile] = None,
+        drills: Optional[List[DrillResponse]] = None
+    ) -> SwingFeedback:
+        """
+        Generate AI-powered coaching feedback based on swing metrics.
+        
+        Drills come from `drills` if given (see find_drills), otherwise they are
+        looked up with `db` before the OpenAI call.
+        """
+        # --- 1./2. Priority issues and drills from the DB (deterministic) ---
+        if drills is not None:
+            final_drills = list(drills)
+        elif db:
+            final_drills = self.find_drills(scores, db)
+        else:
+            final_drills = []
         
         # --- 3. Generate AI Feedback (Analysis Only) ---
         if not self.client:
@@ -330,20 +372,7 @@ Provide coaching feedback in JSON format.
             return "N/A"
         
         if isinstance(value, (int, float)):
-            # Explicit key checks first
-            if "duration" in metric_key or "ms" in metric_key:
-                 return f"{value/1000:.2f}s"
-            
-            if "ratio" in metric_key or "tempo" in metric_key:
-                return f"{value:.2f}:1"
-            
-            if "deg" in metric_key or "angle" in metric_key:
-                return f"{value:.1f}°"
-            
-            if "range" in metric_key or "amount" in metric_key or "index" in metric_key:
-                return f"{value:.3f}"
-            
-            return f"{value:.1f}"
+            return _metric_formatter(metric_key)(value)
         
         return str(value)
 
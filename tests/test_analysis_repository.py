@@ -0,0 +1,250 @@
+import sys
+import os
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.core.database import Base
+import app.models.user  # noqa: F401 - register User/Credits mappers for relationships
+import app.models.credits  # noqa: F401
+from app.models.db import SwingSession
+from app.services.analysis_repository import AnalysisRepository
+from app.schemas import SwingAnalysisRequest, SwingMetrics, SwingPhases, SwingScores, SwingFeedback, DrillResponse
+
+
+def _make_db():
+    engine = create_engine(
+        "sqlite://",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool,
+    )
+    Base.metadata.create_all(bind=engine)
+    return sessionmaker(autocommit=False, autoflush=False, bind=engine)()
+
+
+def _save(repo, overall_score=80, user_id="user-1", club_type="driver", feedback=None):
+    return repo.save_analysis(
+        metadata=SwingAnalysisRequest(handedness="right", view="face_on", club_type=club_type),
+        metrics=SwingMetrics(tempo_ratio=3.0, chest_turn_top_deg=90.0),
+        phases=SwingPhases(address_frame=0, top_frame=10, impact_frame=20, finish_frame=30),
+        scores=SwingScores(overall_score=overall_score, metric_scores={}),
+        feedback=feedback,
+        user_id=user_id,
+    )
+
+
+def test_save_analysis_persists_all_rows():
+    db = _make_db()
+    repo = AnalysisRepository(db)
+    feedback = SwingFeedback(
+        summary="Solid swing",
+        priority_issues=["Tempo"],
+        drills=[],
+        phase_feedback={"top": "Good turn"},
+    )
+
+    saved = _save(repo, feedback=feedback)
+
+    loaded = db.query(SwingSession).filter(SwingSession.id == saved.id).first()
+    assert loaded is not None
+    assert loaded.metrics.session_id == saved.id
+    assert loaded.metrics.tempo_ratio == 3.0
+    assert loaded.phases.top_frame == 10
+    assert loaded.feedback.phase_feedback == {"top": "Good turn"}
+
+
+def test_save_analysis_without_feedback():
+    db = _make_db()
+    repo = AnalysisRepository(db)
+
+    saved = _save(repo)
+
+    assert saved.feedback is None
+    assert saved.metrics.chest_turn_top_deg == 90.0
+
+
+def test_save_analysis_persists_extended_metrics():
+    db = _make_db()
+    repo = AnalysisRepository(db)
+
+    saved = repo.save_analysis(
+        metadata=SwingAnalysisRequest(handedness="right", view="face_on", club_type="driver"),
+        metrics=SwingMetrics(tempo_ratio=3.1, finish_balance=0.8, hand_height_finish_label="high"),
+        phases=SwingPhases(address_frame=0, top_frame=10, impact_frame=20, finish_frame=30),
+        scores=SwingScores(overall_score=75, metric_scores={}),
+        feedback=None,
+        user_id="user-1",
+    )
+
+    assert saved.metrics.finish_balance == 0.8
+    assert saved.metrics.hand_height_finish_label == "high"
+    assert saved.metrics.pelvis_sway_top_cm is None
+
+
+def test_save_feedback_upserts_single_row():
+    from app.models.db import SwingFeedbackDB
+
+    db = _make_db()
+    repo = AnalysisRepository(db)
+    saved = _save(repo, feedback=SwingFeedback(
+        summary="First pass", priority_issues=[], drills=[], phase_feedback={}
+    ))
+
+    drill = DrillResponse(id="drill-1", title="Wall drill", description="Hips to wall", category="Posture")
+    updated = repo.save_feedback(saved.id, SwingFeedback(
+        summary="Second pass", priority_issues=["Spine angle"], drills=[drill], phase_feedback={"impact": "Stay in posture"}
+    ))
+
+    assert db.query(SwingFeedbackDB).filter(SwingFeedbackDB.session_id == saved.id).count() == 1
+    assert updated.summary == "Second pass"
+    assert updated.phase_feedback == {"impact": "Stay in posture"}
+    assert updated.drills[0]["title"] == "Wall drill"
+
+
+def test_delete_session_removes_children():
+    from app.models.db import SwingMetric, SwingPhase, SwingFeedbackDB
+
+    db = _make_db()
+    repo = AnalysisRepository(db)
+    saved = _save(repo, feedback=SwingFeedback(
+        summary="To delete", priority_issues=[], drills=[], phase_feedback={}
+    ))
+    session_id = saved.id
+
+    assert repo.delete_session(session_id) is True
+    assert repo.get_session(session_id) is None
+    for model in (SwingMetric, SwingPhase, SwingFeedbackDB):
+        assert db.query(model).filter(model.session_id == session_id).count() == 0
+
+    assert repo.delete_session(session_id) is False
+
+
+def test_get_recent_metrics_filters_by_user_and_club():
+    db = _make_db()
+    repo = AnalysisRepository(db)
+    _save(repo, user_id="user-1", club_type="driver")
+    _save(repo, user_id="user-1", club_type="iron")
+    _save(repo, user_id="user-2", club_type="driver")
+
+    driver_metrics = repo.get_recent_metrics("user-1", club_type="driver")
+    assert len(driver_metrics) == 1
+    assert driver_metrics[0]["tempo_ratio"] == 3.0
+    # Legacy alias is derived from the renamed metric, None values are dropped
+    assert driver_metrics[0]["shoulder_turn_top_deg"] == 90.0
+    assert "finish_balance" not in driver_metrics[0]
+
+    assert len(repo.get_recent_metrics("user-1")) == 2
+    assert repo.get_recent_metrics("nobody") == []
+
+
+def test_set_personal_best_moves_flag():
+    db = _make_db()
+    repo = AnalysisRepository(db)
+    first = _save(repo, overall_score=70)
+    second = _save(repo, overall_score=85)
+    other_user = _save(repo, overall_score=60, user_id="user-2")
+
+    repo.set_personal_best(first.id, "driver", "face_on", user_id="user-1")
+    repo.set_personal_best(other_user.id, "driver", "face_on", user_id="user-2")
+    repo.set_personal_best(second.id, "driver", "face_on", user_id="user-1")
+
+    db.expire_all()
+    assert first.is_personal_best is False
+    assert second.is_personal_best is True
+    assert other_user.is_personal_best is True
+
+
+def test_claim_personal_best_requires_strictly_higher_score():
+    db = _make_db()
+    repo = AnalysisRepository(db)
+    first = _save(repo, overall_score=70)
+    assert repo.claim_personal_best(first.id, "driver", "face_on", user_id="user-1") is True
+
+    tie = _save(repo, overall_score=70)
+    assert repo.claim_personal_best(tie.id, "driver", "face_on", user_id="user-1") is False
+
+    # Other users' and other clubs' sessions don't count
+    _save(repo, overall_score=99, user_id="user-2")
+    _save(repo, overall_score=99, club_type="iron")
+    better = _save(repo, overall_score=85)
+    assert repo.claim_personal_best(better.id, "driver", "face_on", user_id="user-1") is True
+
+    db.expire_all()
+    assert first.is_personal_best is False
+    assert tie.is_personal_best is False
+    assert better.is_personal_best is True
+
+
+def test_ensure_indexes_upgrades_existing_feedback_table():
+    from sqlalchemy import inspect, text
+    from app.core.database import ensure_indexes
+    from app.models.db import SwingFeedbackDB
+
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    Base.metadata.create_all(bind=engine)
+    # Layout of a database created before the upsert: swing_feedback as the
+    # original model created it (no session_id index, duplicate rows allowed)
+    # and no composite session indexes
+    with engine.begin() as conn:
+        for name in ("ix_swing_user_created", "ix_swing_personal_best"):
+            conn.execute(text(f"DROP INDEX {name}"))
+        conn.execute(text("DROP TABLE swing_feedback"))
+        conn.execute(text("""
+            CREATE TABLE swing_feedback (
+                id INTEGER NOT NULL,
+                session_id VARCHAR,
+                summary VARCHAR,
+                priority_issues JSON,
+                drills JSON,
+                phase_feedback JSON,
+                PRIMARY KEY (id),
+                FOREIGN KEY(session_id) REFERENCES swing_sessions (id)
+            )
+        """))
+        conn.execute(text("CREATE INDEX ix_swing_feedback_id ON swing_feedback (id)"))
+        conn.execute(text(
+            "INSERT INTO swing_feedback (session_id, summary) VALUES ('s1', 'old'), ('s1', 'new'), (NULL, 'a'), (NULL, 'b')"
+        ))
+
+    ensure_indexes(engine)
+    ensure_indexes(engine)  # idempotent
+
+    indexes = {ix["name"]: ix for ix in inspect(engine).get_indexes("swing_feedback")}
+    assert indexes["ix_swing_feedback_session_id"]["unique"]
+    session_indexes = {ix["name"] for ix in inspect(engine).get_indexes("swing_sessions")}
+    assert {"ix_swing_user_created", "ix_swing_personal_best"} <= session_indexes
+
+    db = sessionmaker(bind=engine)()
+    assert [f.summary for f in db.query(SwingFeedbackDB).filter(SwingFeedbackDB.session_id == "s1")] == ["new"]
+    assert db.query(SwingFeedbackDB).filter(SwingFeedbackDB.session_id.is_(None)).count() == 2
+    repo = AnalysisRepository(db)
+    repo.save_feedback("s1", SwingFeedback(summary="upserted", priority_issues=[], drills=[], phase_feedback={}))
+    assert db.query(SwingFeedbackDB).filter(SwingFeedbackDB.session_id == "s1").count() == 1
+
+
+def test_save_analysis_keeps_legacy_metric_only_when_it_differs():
+    db = _make_db()
+    repo = AnalysisRepository(db)
+
+    saved = repo.save_analysis(
+        metadata=SwingAnalysisRequest(handedness="right", view="face_on", club_type="driver"),
+        # MHR-style session: signed 3D chest turn, 2D legacy shoulder turn
+        metrics=SwingMetrics(
+            chest_turn_top_deg=-20.0, shoulder_turn_top_deg=35.0,
+            pelvis_turn_top_deg=40.0, hip_turn_top_deg=40.0,
+        ),
+        phases=SwingPhases(address_frame=0, top_frame=10, impact_frame=20, finish_frame=30),
+        scores=SwingScores(overall_score=75, metric_scores={}),
+        feedback=None,
+        user_id="user-1",
+    )
+
+    assert saved.metrics.shoulder_turn_top_deg == 35.0
+    assert saved.metrics.chest_turn_top_deg == -20.0
+    assert saved.metrics._hip_turn_top_deg is None
+    assert saved.metrics.hip_turn_top_deg == 40.0
+    assert repo.get_recent_metrics("user-1")[0]["shoulder_turn_top_deg"] == 35.0
@@ -0,0 +1,31 @@
+import sys
+import os
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from pose.club_normalization import get_metric_range, normalize_metric, normalize_metrics_batch
+
+
+def test_metric_range_applies_club_fallbacks():
+    assert get_metric_range("x_factor_top_deg", "Driver") == (40, 70)
+    # Unknown clubs fall back to mid_iron
+    assert get_metric_range("x_factor_top_deg", "putter") == (33, 62)
+    assert get_metric_range("not_a_metric", "driver") is None
+
+
+def test_normalize_metric_scores_and_flags():
+    assert normalize_metric(55, "x_factor_top_deg", "driver") == {"score": 1.0, "flag": "OK", "range": [40, 70]}
+    assert normalize_metric(70, "x_factor_top_deg", "driver")["score"] == 0.5
+    low = normalize_metric(25, "x_factor_top_deg", "driver")
+    assert low["flag"] == "LOW" and low["score"] == 0.25
+    assert normalize_metric(None, "x_factor_top_deg", "driver") == {"score": None, "flag": None, "range": None}
+
+
+def test_batch_matches_single_metric():
+    metrics = {"x_factor_top_deg": 62.0, "chest_turn_top_deg": 120.0, "pelvis_turn_top_deg": None}
+    batch = normalize_metrics_batch(metrics, "driver")
+
+    assert "pelvis_turn_top_deg" not in batch
+    for name in ("x_factor_top_deg", "chest_turn_top_deg"):
+        assert batch[name] == normalize_metric(metrics[name], name, "driver")
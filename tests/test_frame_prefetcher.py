@@ -0,0 +1,60 @@
+import sys
+import os
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import cv2
+import numpy as np
+
+from pose.frame_prefetcher import prefetch_frames
+
+
+def _write_video(path, n_frames=25):
+    writer = cv2.VideoWriter(str(path), cv2.VideoWriter_fourcc(*'MJPG'), 30, (32, 24))
+    for i in range(n_frames):
+        writer.write(np.full((24, 32, 3), i * 10 % 256, np.uint8))
+    writer.release()
+
+
+def test_prefetch_frames_matches_sequential_read(tmp_path):
+    path = tmp_path / "clip.avi"
+    _write_video(path)
+
+    cap = cv2.VideoCapture(str(path))
+    expected = []
+    while True:
+        ok, frame = cap.read()
+        if not ok:
+            break
+        expected.append(frame)
+    cap.release()
+
+    cap = cv2.VideoCapture(str(path))
+    got = list(prefetch_frames(cap, maxsize=2))
+    cap.release()
+
+    assert [idx for idx, _ in got] == list(range(len(expected)))
+    assert all(np.array_equal(frame, expected[idx]) for idx, frame in got)
+
+
+def test_prefetch_frames_step_and_limit(tmp_path):
+    path = tmp_path / "clip.avi"
+    _write_video(path)
+
+    cap = cv2.VideoCapture(str(path))
+    indices = [idx for idx, _ in prefetch_frames(cap, frame_step=3, max_frames=10)]
+    cap.release()
+
+    assert indices == [0, 3, 6, 9]
+
+
+def test_prefetch_frames_early_close_stops_reader(tmp_path):
+    path = tmp_path / "clip.avi"
+    _write_video(path)
+
+    cap = cv2.VideoCapture(str(path))
+    it = prefetch_frames(cap, maxsize=1)
+    assert next(it)[0] == 0
+    it.close()  # must not hang on the full queue
+    cap.release()
@@ -0,0 +1,71 @@
+import sys
+import os
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from pose.pose_archive import load_pose_dicts, save_poses_npz
+from pose.types import FramePose, Point3D
+
+
+def _poses(n_frames=3, n_landmarks=33):
+    return [
+        FramePose(
+            frame_index=i,
+            timestamp_ms=i * 33.3,
+            landmarks=[Point3D(0.1 + j * 0.01, 0.5 - i * 0.02, -0.25, 0.9) for j in range(n_landmarks)],
+        )
+        for i in range(n_frames)
+    ]
+
+
+def test_round_trip_within_quantization_step(tmp_path):
+    poses = _poses()
+    path = tmp_path / "s_poses.npz"
+    save_poses_npz(path, poses)
+
+    frames = load_pose_dicts(path)
+
+    assert [f["frame_index"] for f in frames] == [p.frame_index for p in poses]
+    assert [f["timestamp_ms"] for f in frames] == [p.timestamp_ms for p in poses]
+    for frame, pose in zip(frames, poses):
+        assert frame["smpl_pose"] is None
+        assert len(frame["landmarks"]) == len(pose.landmarks)
+        for got, lm in zip(frame["landmarks"], pose.landmarks):
+            assert abs(got["x"] - lm.x) <= 0.5e-4
+            assert abs(got["y"] - lm.y) <= 0.5e-4
+            assert abs(got["z"] - lm.z) <= 0.5e-4
+            assert abs(got["visibility"] - lm.visibility) <= 0.5 / 255
+
+
+def test_empty_poses(tmp_path):
+    path = tmp_path / "empty_poses.npz"
+    save_poses_npz(path, [])
+    assert load_pose_dicts(path) == []
+
+
+def test_partial_smpl_pose_kept_per_frame(tmp_path):
+    rot = [[[1.0, 0.0, 0.0], [0.0, 1.0, 0.0], [0.0, 0.0, 1.0]]] * 24
+    poses = [p._replace(smpl_pose=rot if p.frame_index != 1 else None) for p in _poses()]
+    path = tmp_path / "s_poses.npz"
+    save_poses_npz(path, poses)
+
+    frames = load_pose_dicts(path)
+
+    assert frames[0]["smpl_pose"] == rot
+    assert frames[1]["smpl_pose"] is None
+    assert frames[2]["smpl_pose"] == rot
+    assert not (tmp_path / "s_poses.npz.tmp").exists()
+
+
+def test_out_of_range_coordinates_not_clipped(tmp_path):
+    poses = _poses()
+    poses[0].landmarks[0] = Point3D(5.0, -4.5, 0.0, 1.0)
+    path = tmp_path / "s_poses.npz"
+    save_poses_npz(path, poses)
+
+    frames = load_pose_dicts(path)
+
+    got = frames[0]["landmarks"][0]
+    assert abs(got["x"] - 5.0) <= 1e-6
+    assert abs(got["y"] + 4.5) <= 1e-6
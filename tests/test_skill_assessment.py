@@ -1,3 +1,5 @@
+import numpy as np
+
 from app.services.skill_assessment import SkillAssessmentService
 from app.schemas import SwingMetrics, SwingScores, MetricScore
 
@@ -38,5 +40,24 @@ def test_skill_assessment():
     print(f"Score 50 -> Skill: {skill} (Expected: Beginner)")
     assert skill == "Beginner"
 
+def test_skill_assessment_batch_matches_single():
+    from app.services.skill_assessment import _LEVELS
+
+    # Integer scores: SwingScores.overall_score is an int
+    overall_scores = [0, 59, 60, 79, 80, 89, 90, 100]
+    idx = SkillAssessmentService.assess_skill_level_batch(overall_scores)
+    assert list(idx) == [0, 0, 1, 1, 2, 2, 3, 3]
+    assert list(np.take(_LEVELS, idx)) == [
+        "Beginner", "Beginner", "Intermediate", "Intermediate",
+        "Advanced", "Advanced", "Pro", "Pro",
+    ]
+
+    service = SkillAssessmentService()
+    metrics = SwingMetrics(tempo_ratio=3.0)
+    for score, level in zip(overall_scores, np.take(_LEVELS, idx)):
+        single = service.assess_skill_level(metrics, SwingScores(overall_score=score, metric_scores={}))
+        assert single == level, score
+
 if __name__ == "__main__":
     test_skill_assessment()
+    test_skill_assessment_batch_matches_single()